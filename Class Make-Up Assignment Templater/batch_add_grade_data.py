@@ -0,0 +1,166 @@
+"""
+Columnar, multi-course version of sts10si_add_grade_data.py.
+
+Loads each course's attendance CSV with the pyarrow CSV reader, computes the
+missing attendance/reflections and words to write as vectorized column
+expressions, splits students into finished and make-up tables in one pass, and
+processes every CSV in a folder in parallel.
+
+Per-course thresholds come from an optional JSON config keyed by CSV file name
+(without extension), e.g.
+{
+    "sts10si_attendance_input": {"required_attendance": 7, "required_reflections": 6},
+    "cs81si_attendance": {"required_attendance": 8, "words_per_missing_thing": 150}
+}
+Anything left out falls back to DEFAULT_CONFIG.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from script_utils.csv_stream import AtomicCsvWriter  # noqa: E402
+
+DEFAULT_CONFIG = {
+    'required_attendance': 7,
+    'required_reflections': 6,
+    'words_per_missing_thing': 100,
+}
+
+FINISHED_COLUMNS = ['email', 'full_name', 'first_name', 'attendance_completed', 'reflections_completed']
+MAKEUP_COLUMNS = FINISHED_COLUMNS + ['attendance_missing', 'reflections_missing', 'total_missing', 'words_to_write']
+FINISHED_SUFFIX = '_output_finished.csv'
+MAKEUP_SUFFIX = '_output_makeup.csv'
+
+
+def read_attendance(input_path):
+    """Read an attendance CSV with every column as a non-null string, like csv.DictReader."""
+    with open(input_path, 'r', newline='') as file:
+        header = next(csv.reader(file), [])
+    convert_options = pacsv.ConvertOptions(
+        column_types={name: pa.string() for name in header},
+        strings_can_be_null=False,
+    )
+    return pacsv.read_csv(input_path, convert_options=convert_options)
+
+
+def compute_grades(table, config):
+    """
+    Return (finished, makeup) tables for one course's attendance table.
+
+    Students are skipped if they have no name, aren't enrolled, or have 'Dropped' in any column.
+    """
+    # Which students count
+    dropped = None
+    for column in table.columns:
+        is_dropped = pc.equal(column, 'Dropped')
+        dropped = is_dropped if dropped is None else pc.or_(dropped, is_dropped)
+    keep = pc.and_(
+        pc.not_equal(table['Name'], ''),
+        pc.equal(table['Enrolled'], 'TRUE'),
+    )
+    if dropped is not None:
+        keep = pc.and_(keep, pc.invert(dropped))
+    table = table.filter(keep)
+
+    # Contact
+    name = table['Name']
+    email = pc.utf8_trim_whitespace(table['Email'])
+    full_name = pc.utf8_trim_whitespace(name)
+    first_name = pc.list_element(pc.split_pattern(name, ' ', max_splits=1), 0)
+
+    # Existing grades
+    attendance_completed = pc.cast(pc.utf8_trim_whitespace(table['Attendance']), pa.int64())
+    reflections_completed = pc.cast(pc.utf8_trim_whitespace(table['Reflections']), pa.int64())
+
+    # Missing grades
+    attendance_missing = pc.subtract(config['required_attendance'], attendance_completed)
+    reflections_missing = pc.subtract(config['required_reflections'], reflections_completed)
+    total_missing = pc.add(attendance_missing, reflections_missing)
+    words_to_write = pc.multiply(config['words_per_missing_thing'], total_missing)
+
+    grades = pa.table({
+        'email': email,
+        'full_name': full_name,
+        'first_name': first_name,
+        'attendance_completed': attendance_completed,
+        'reflections_completed': reflections_completed,
+        'attendance_missing': attendance_missing,
+        'reflections_missing': reflections_missing,
+        'total_missing': total_missing,
+        'words_to_write': words_to_write,
+    })
+    is_finished = pc.less_equal(words_to_write, 0)
+    finished = grades.filter(is_finished).select(FINISHED_COLUMNS)
+    makeup = grades.filter(pc.invert(is_finished)).select(MAKEUP_COLUMNS)
+    return finished, makeup
+
+
+def write_table_atomic(table, output_path):
+    """
+    Write a table as CSV to a temp file, then rename it over output_path.
+
+    Goes through csv.DictWriter (the tables are small) so the output is formatted
+    exactly like sts10si_add_grade_data.py's, which pyarrow's writer can't match.
+    """
+    with AtomicCsvWriter(output_path, table.column_names) as writer:
+        writer.writerows(table.to_pylist())
+
+
+def grade_course(input_path, output_dir, config):
+    """Grade one course CSV and write its finished and make-up CSVs. Returns the row counts."""
+    course_name = os.path.splitext(os.path.basename(input_path))[0]
+    finished, makeup = compute_grades(read_attendance(input_path), config)
+    write_table_atomic(finished, os.path.join(output_dir, course_name + FINISHED_SUFFIX))
+    write_table_atomic(makeup, os.path.join(output_dir, course_name + MAKEUP_SUFFIX))
+    return course_name, finished.num_rows, makeup.num_rows
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Compute make-up assignments for every course CSV in a folder.')
+    parser.add_argument('input_dir', help='Folder of attendance CSVs, one per course')
+    parser.add_argument('--config', help='JSON file of per-course thresholds, keyed by CSV name')
+    parser.add_argument('--output-dir', help='Where to write outputs (defaults to input_dir/output)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Courses to process in parallel')
+    args = parser.parse_args()
+
+    course_configs = {}
+    if args.config:
+        with open(args.config, 'r') as file:
+            course_configs = json.load(file)
+
+    output_dir = args.output_dir or os.path.join(args.input_dir, 'output')
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Skip earlier outputs, in case --output-dir is the input folder
+    input_paths = sorted(
+        os.path.join(args.input_dir, filename)
+        for filename in os.listdir(args.input_dir)
+        if filename.lower().endswith('.csv') and not filename.endswith((FINISHED_SUFFIX, MAKEUP_SUFFIX))
+    )
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {}
+        for input_path in input_paths:
+            course_name = os.path.splitext(os.path.basename(input_path))[0]
+            config = {**DEFAULT_CONFIG, **course_configs.get(course_name, {})}
+            futures[executor.submit(grade_course, input_path, output_dir, config)] = input_path
+        for future in as_completed(futures):
+            try:
+                course_name, num_finished, num_makeup = future.result()
+                print(f'{course_name}: {num_finished} finished, {num_makeup} need make-up work')
+            except Exception as exc:  # pylint: disable=broad-except
+                print(f'Error processing {futures[future]}: {exc}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,9 @@
 import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from script_utils.csv_stream import AtomicCsvWriter  # noqa: E402
 
 # Config
 INPUT_FILE = 'sts10si_attendance_input.csv'
@@ -8,53 +13,46 @@ REQUIRED_ATTENDANCE = 7
 REQUIRED_REFLECTIONS = 6
 WORDS_PER_MISSING_THING = 100
 
-# Open the CSV file
-with open(INPUT_FILE, 'r') as file:
-    # Read the CSV data into a list of dictionaries
+FINISHED_FIELDNAMES = ['email', 'full_name', 'first_name', 'attendance_completed', 'reflections_completed']
+MAKEUP_FIELDNAMES = FINISHED_FIELDNAMES + ['attendance_missing', 'reflections_missing', 'total_missing', 'words_to_write']
+
+# Stream the input rows straight into both output files, one row at a time
+with open(INPUT_FILE, 'r', newline='') as file, \
+        AtomicCsvWriter(OUTPUT_FILE_FINISHED, FINISHED_FIELDNAMES) as writer_finished, \
+        AtomicCsvWriter(OUTPUT_FILE_MAKEUP, MAKEUP_FIELDNAMES) as writer_makeup:
     reader = csv.DictReader(file)
-    input_data = list(reader)
-
-# Calculate the stuff for each student
-output_data_finished = []
-output_data_makeup = []
-for input_row in input_data:
-    if input_row['Name'] == '' or input_row['Enrolled'] != 'TRUE' or 'Dropped' in input_row.values():
-        continue
-    output_row = {}
-    # Contact
-    output_row['email'] = input_row['Email'].strip()
-    output_row['full_name'] = input_row['Name'].strip()
-    output_row['first_name'] = input_row['Name'].split(' ')[0]
-
-    # Existing grades
-    attendance_completed = int(input_row['Attendance'].strip())
-    reflections_completed = int(input_row['Reflections'].strip())
-    output_row['attendance_completed'] = attendance_completed
-    output_row['reflections_completed'] = reflections_completed
-
-    # Missing grades
-    attendance_missing = REQUIRED_ATTENDANCE - attendance_completed
-    reflections_missing = REQUIRED_REFLECTIONS - reflections_completed
-
-    total_missing = attendance_missing + reflections_missing
-    words_to_write = WORDS_PER_MISSING_THING * total_missing
-
-    if words_to_write <= 0:
-        output_data_finished.append(output_row)
-    else:
-        # Make-up stuff
-        output_row['attendance_missing'] = attendance_missing
-        output_row['reflections_missing'] = reflections_missing
-
-        output_row['total_missing'] = total_missing
-        output_row['words_to_write'] = words_to_write
-
-        output_data_makeup.append(output_row)
-
-# Write output
-for output_file, output_data in [(OUTPUT_FILE_FINISHED, output_data_finished), (OUTPUT_FILE_MAKEUP, output_data_makeup)]:
-    with open(output_file, 'w', newline='\n') as file:
-        # Write the CSV data
-        writer = csv.DictWriter(file, fieldnames=output_data[0].keys())
-        writer.writeheader()
-        writer.writerows(output_data)
+
+    # Calculate the stuff for each student
+    for input_row in reader:
+        if input_row['Name'] == '' or input_row['Enrolled'] != 'TRUE' or 'Dropped' in input_row.values():
+            continue
+        output_row = {}
+        # Contact
+        output_row['email'] = input_row['Email'].strip()
+        output_row['full_name'] = input_row['Name'].strip()
+        output_row['first_name'] = input_row['Name'].split(' ')[0]
+
+        # Existing grades
+        attendance_completed = int(input_row['Attendance'].strip())
+        reflections_completed = int(input_row['Reflections'].strip())
+        output_row['attendance_completed'] = attendance_completed
+        output_row['reflections_completed'] = reflections_completed
+
+        # Missing grades
+        attendance_missing = REQUIRED_ATTENDANCE - attendance_completed
+        reflections_missing = REQUIRED_REFLECTIONS - reflections_completed
+
+        total_missing = attendance_missing + reflections_missing
+        words_to_write = WORDS_PER_MISSING_THING * total_missing
+
+        if words_to_write <= 0:
+            writer_finished.writerow(output_row)
+        else:
+            # Make-up stuff
+            output_row['attendance_missing'] = attendance_missing
+            output_row['reflections_missing'] = reflections_missing
+
+            output_row['total_missing'] = total_missing
+            output_row['words_to_write'] = words_to_write
+
+            writer_makeup.writerow(output_row)
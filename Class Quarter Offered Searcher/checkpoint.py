@@ -0,0 +1,110 @@
+"""
+Crash-safe progress for long get_class_quarters.py runs.
+
+Completed rows are appended to a JSONL journal next to the CSV as soon as they
+finish, and the CSV itself is only ever replaced atomically (write a temp file
+in the same folder, then rename over the original). After a crash, --resume
+replays the journal and skips every row that's already filled in.
+
+The UG reqs aren't written to the CSV, so every checkpoint also saves each
+finished class's UG reqs to a JSON file next to it, which --resume reads for
+the rows it skips.
+"""
+
+import csv
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from script_utils.csv_stream import copy_target_mode  # noqa: E402
+
+
+def _write_atomic(path, write, newline=None):
+    """Call write(file) on a temp file next to path, then atomically rename it over path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    suffix = os.path.splitext(path)[1] + ".tmp"
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=suffix)
+    try:
+        with os.fdopen(fd, "w", newline=newline, encoding="utf-8") as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        copy_target_mode(temp_path, path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_csv_atomic(path, rows, fieldnames):
+    """Write rows to a temp file next to path, then atomically rename it over path."""
+
+    def write(file):
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    _write_atomic(path, write, newline="\n")
+
+
+def ug_reqs_path(csv_path):
+    return csv_path + ".ug_reqs.json"
+
+
+def load_ug_reqs(csv_path):
+    """Return {class name: UG reqs} saved by earlier runs, or {} if there aren't any."""
+    try:
+        with open(ug_reqs_path(csv_path), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def write_ug_reqs_atomic(csv_path, class_ug_reqs):
+    """Atomically save {class name: UG reqs} next to the CSV."""
+    _write_atomic(ug_reqs_path(csv_path), lambda file: json.dump(class_ug_reqs, file, indent=1, sort_keys=True))
+
+
+class RowJournal:
+    """Append-only JSONL log of completed rows, e.g. {"index": 3, "Class": "CS 224N", ...}."""
+
+    def __init__(self, csv_path):
+        self.path = csv_path + ".journal.jsonl"
+        self._file = None
+
+    def load(self):
+        """Return {row index: entry} for every complete line in the journal."""
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from a crash mid-write
+                    continue
+                entries[entry["index"]] = entry
+        return entries
+
+    def append(self, entry):
+        """Durably record one completed row."""
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Delete the journal once its rows are safely in the CSV."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,58 @@
+"""
+Extract course info from explorecourses search pages in a single pass.
+
+Each page is parsed once with lxml (C, much faster than bs4's html.parser), and
+every .searchResult on it is indexed by course number, so one department-wide
+page can answer lookups for all of its classes.
+"""
+
+from collections import namedtuple
+
+from lxml import html as lxml_html
+
+# E.g. Course(number='CS 224N', title='Natural Language Processing with Deep Learning',
+#             terms='Win', ug_reqs=['WAY-AQR', ...])
+Course = namedtuple("Course", ["number", "title", "terms", "ug_reqs"])
+
+
+def course_key(course_number):
+    """Lookup key for a course number, ignoring spaces (e.g. CS 224N -> CS224N)."""
+    return course_number.replace(" ", "")
+
+
+def _attribute(attributes_text, label):
+    """Text after e.g. 'Terms:' up to the end of that line, or '' if the label is missing."""
+    parts = attributes_text.split(label, 1)
+    if len(parts) == 1:
+        return ""
+    rest = parts[1].splitlines()
+    return rest[0].strip() if rest else ""
+
+
+def index_search_results(page):
+    """
+    Parse a search page and return {course_key: Course} for every .searchResult on it.
+
+    Terms and UG reqs both come from the first courseAttributes div, e.g.
+    <div class="courseAttributes">   Terms: Win | Units: 3-4 | UG Reqs: WAY-AQR</div>
+    """
+    tree = lxml_html.fromstring(page)
+    courses = {}
+    for search_result in tree.find_class("searchResult"):
+        number_spans = search_result.find_class("courseNumber")
+        if not number_spans:
+            continue
+        number = number_spans[0].text_content().strip().rstrip(":").strip()
+
+        title_spans = search_result.find_class("courseTitle")
+        title = title_spans[0].text_content() if title_spans else ""
+
+        attribute_divs = search_result.find_class("courseAttributes")
+        attributes_text = attribute_divs[0].text_content() if attribute_divs else ""
+        terms = _attribute(attributes_text, "Terms:")
+        ug_reqs_string = _attribute(attributes_text, "UG Reqs:")
+        ug_reqs = ug_reqs_string.split(", ") if ug_reqs_string else []
+
+        # Keep the first listing if a course shows up twice on one page
+        courses.setdefault(course_key(number), Course(number, title, terms, ug_reqs))
+    return courses
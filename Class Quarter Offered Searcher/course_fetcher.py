@@ -0,0 +1,170 @@
+"""
+Concurrent, disk-cached fetching of explorecourses search pages.
+
+Class codes are deduplicated, then fetched in parallel through one pooled
+requests.Session. Every page is cached on disk for CACHE_TTL seconds, so
+re-running the script after editing a few rows only fetches the new classes.
+
+Point `base_url` at a local HTTP server (e.g. `python -m http.server`) to test
+without hitting explorecourses.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import quote
+
+BASE_URL = "https://explorecourses.stanford.edu"
+SEARCH_PATH = "/print?filter-term-Winter=on&filter-term-Autumn=on&filter-term-Spring=on&filter-coursestatus-Active=on&q="
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".explorecourses_cache")
+CACHE_TTL = 7 * 24 * 60 * 60  # One week, in seconds
+MAX_WORKERS = 16
+TIMEOUT = 30
+
+
+def department_query(class_code):
+    """Search query shared by a department's classes, e.g. CS224N -> CS, MS&E226 -> MS&E."""
+    match = re.match(r"\D+", class_code)
+    return match.group(0) if match else class_code
+
+
+def group_queries(class_codes, min_group_size=2):
+    """
+    Map each class code to the query whose result page should list it.
+
+    The print endpoint returns every match on one page, so classes from the same
+    department can share one department-wide search. Departments with fewer than
+    min_group_size classes keep a per-class search, which returns a much smaller page.
+    """
+    class_codes = list(dict.fromkeys(class_codes))
+    department_sizes = Counter(department_query(code) for code in class_codes)
+    return {
+        code: department_query(code) if department_sizes[department_query(code)] >= min_group_size else code
+        for code in class_codes
+    }
+
+
+class CourseFetcher:
+    """Fetches explorecourses search pages with bounded parallelism and a TTL disk cache."""
+
+    def __init__(
+        self,
+        base_url=BASE_URL,
+        cache_dir=CACHE_DIR,
+        cache_ttl=CACHE_TTL,
+        max_workers=MAX_WORKERS,
+        timeout=TIMEOUT,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+
+        # One pooled session shared by all the workers (requests is imported here
+        # so that --help and argument errors don't pay for it)
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.max_workers,
+            pool_maxsize=self.max_workers,
+            max_retries=2,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def search_url(self, query):
+        """URL of the printable search results page for a query (e.g. CS224N)."""
+        return self.base_url + SEARCH_PATH + quote(query)
+
+    def _cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".html")
+
+    def _read_cache(self, url):
+        """Return the cached page for a URL, or None if missing or older than the TTL."""
+        if not self.cache_dir:
+            return None
+        path = self._cache_path(url)
+        try:
+            if time.time() - os.path.getmtime(path) > self.cache_ttl:
+                return None
+            with open(path, "r", encoding="utf-8") as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def _write_cache(self, url, text):
+        """Write a page to the cache atomically so concurrent runs never see partial files."""
+        if not self.cache_dir:
+            return
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                file.write(text)
+            os.replace(temp_path, self._cache_path(url))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def fetch(self, query):
+        """Fetch (or load from cache) the search page for one query."""
+        url = self.search_url(query)
+        text = self._read_cache(url)
+        if text is not None:
+            return text
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        self._write_cache(url, response.text)
+        return response.text
+
+    def fetch_many(self, queries):
+        """
+        Fetch the search pages for many queries concurrently.
+
+        Returns a dict of {query: page HTML}. Queries that failed to fetch map to
+        None so that one bad response doesn't stop the rest of the run.
+        """
+        unique_queries = list(dict.fromkeys(queries))
+        pages = {}
+
+        # Serve whatever we can from the cache first
+        to_fetch = []
+        for query in unique_queries:
+            text = self._read_cache(self.search_url(query))
+            if text is None:
+                to_fetch.append(query)
+            else:
+                pages[query] = text
+
+        if not to_fetch:
+            return pages
+
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        import requests
+        from tqdm import tqdm
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.fetch, query): query for query in to_fetch}
+            for future in tqdm(
+                as_completed(futures),
+                total=len(futures),
+                desc=f"Fetching ({len(pages)} cached)",
+            ):
+                query = futures[future]
+                try:
+                    pages[query] = future.result()
+                except requests.RequestException as exc:
+                    tqdm.write(f"Error fetching {query}: {exc}")
+                    pages[query] = None
+
+        return pages
@@ -6,112 +6,251 @@ and write them to the same CSV file for easier course scheduling.
 Overly specific to my format at https://docs.google.com/spreadsheets/d/1xBFkjG0QsqiVO62wHE0PvM8uVODwG9SBvLIYkvkiPjo/edit
 """
 
+import argparse
 import csv
-import requests
-from bs4 import BeautifulSoup
-from tqdm import tqdm
-
-# Ignore reportOptionalMemberAccess in Pylance
-# (https://stackoverflow.com/questions/4998629/syntaxerror-non-keyword-arg-after-keyword-arg)
-
-# File selection
-INPUT_FILE = input("Enter the path of a CSV file...\n")
-# INPUT_FILE = './Classes I Want To Take - Gabe Mukobi - Classes.csv'
-
-# Format filename to avoid invalid arguments (e.g. \\ on Windows, remove quotes)
-INPUT_FILE = INPUT_FILE.replace("\\", "/").replace('"', "").replace("'", "")
-
-# Load in CSV data
-input_data = []
-with open(INPUT_FILE, "r", encoding="utf-8") as file:
-    # Read the CSV data into a list of dictionaries
-    reader = csv.DictReader(file)
-    input_data = list(reader)
-
-# Skip first row due to merged 2-row header
-input_data = input_data[1:]
-
-# Debug: Only do a few rows
-# input_data = input_data[450:]
-
-# Store the UG-reqs requirements as a dictionary to print at the end
-# E.g. {'WAY-AQR': ['ENGR 76', ...], ...}
-# Don't write them to the file so the user can pick which ones are important or not.
-all_ug_reqs = {}
-
-# For each row
-for row in tqdm(input_data):
-    # Get the class name
-    class_name = row["Class"]
-
-    # Remove any spaces in the class name (e.g. CS 224N -> CS224N)
-    class_name_nospace = class_name.replace(" ", "")
-
-    # Get the class quarters
-    url = (
-        "https://explorecourses.stanford.edu/print?filter-term-Winter=on&filter-term-Autumn=on&filter-term-Spring=on&filter-coursestatus-Active=on&q="
-        + class_name_nospace
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from script_utils.instrumentation import add_profile_argument, count, enable_from_args, stage  # noqa: E402
+from checkpoint import RowJournal, load_ug_reqs, write_csv_atomic, write_ug_reqs_atomic
+from course_fetcher import BASE_URL, CACHE_DIR, CACHE_TTL, MAX_WORKERS, CourseFetcher, group_queries
+
+
+def parse_args():
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input_file", nargs="?", help="CSV file to update (prompted for if omitted)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Maximum concurrent requests")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Directory for cached result pages")
+    parser.add_argument("--cache-ttl", type=float, default=CACHE_TTL, help="Seconds before a cached page is refetched")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the page cache")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Search once per department instead of once per class",
+    )
+    parser.add_argument(
+        "--min-batch-size",
+        type=int,
+        default=2,
+        help="Only batch departments with at least this many classes",
+    )
+    parser.add_argument("--base-url", default=BASE_URL, help="explorecourses base URL (e.g. a local stub server)")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Replay the progress journal from a crashed run and skip rows that are already filled in",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=25,
+        help="Atomically rewrite the CSV after this many completed rows",
     )
-    response = requests.get(url, timeout=1000)
-    soup = BeautifulSoup(response.text, "html.parser")
+    add_profile_argument(parser)
+    return parser.parse_args()
+
+
+def load_rows(input_file):
+    """Load the CSV as (header rows, data rows, fieldnames)."""
+    with open(input_file, "r", encoding="utf-8") as file:
+        # Read the CSV data into a list of dictionaries
+        reader = csv.DictReader(file)
+        input_data = list(reader)
+        fieldnames = reader.fieldnames
+
+    # Skip first row due to merged 2-row header (but keep it to write back out)
+    return input_data[:1], input_data[1:], fieldnames
+
+
+def add_ug_reqs(all_ug_reqs, class_name, ug_reqs):
+    """Add class to dictionary for each UG req"""
+    for ug_req in ug_reqs:
+        if ug_req not in all_ug_reqs:
+            all_ug_reqs[ug_req] = []
+        all_ug_reqs[ug_req].append(class_name)
 
-    # Find the .searchResult that contains `<span class="courseNumber">{class_name}:</span>`
-    course_span = soup.find(
-        "span", text=lambda text: bool(text) and (class_name + ":" in text)
+
+# Parse each distinct page only once, since batched pages are shared by many rows
+page_indexes = {}
+
+
+def find_course(page, class_name_nospace):
+    """Find the course listed on a page as e.g. `<span class="courseNumber">CS 224N:</span>`."""
+    if page not in page_indexes:
+        from course_extractor import index_search_results
+
+        with stage("parse"):
+            page_indexes[page] = index_search_results(page)
+        count("pages_parsed")
+    return page_indexes[page].get(class_name_nospace)
+
+
+def fetch_pages(args, class_names):
+    """
+    Fetch the search page for every distinct class up front, concurrently and cached.
+
+    Returns {class name without spaces: page HTML or None}.
+    """
+    fetcher = CourseFetcher(
+        base_url=args.base_url,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        cache_ttl=args.cache_ttl,
+        max_workers=args.workers,
     )
-    if course_span is None:
-        # If the class name is not found, skip this row
-        row["Aut"] = row["Win"] = row["Spr"] = "FALSE"
-        continue
+    if not args.batch:
+        with stage("http"):
+            return fetcher.fetch_many(class_names)
 
-    # Go up three parent levels to the .searchResult
-    search_result = course_span.findParent("div", {"class": "searchResult"})
+    # One search per department, then fall back to a search per class for
+    # anything the department page didn't list
+    queries = group_queries(class_names, min_group_size=args.min_batch_size)
+    with stage("http"):
+        query_pages = fetcher.fetch_many(queries.values())
+    pages = {class_name_nospace: query_pages[query] for class_name_nospace, query in queries.items()}
+    missing = [
+        class_name_nospace
+        for class_name_nospace, query in queries.items()
+        if query != class_name_nospace
+        and pages[class_name_nospace] is not None
+        and find_course(pages[class_name_nospace], class_name_nospace) is None
+    ]
+    if missing:
+        print(f"{len(missing)} classes not found on department pages, searching individually")
+        with stage("http"):
+            pages.update(fetcher.fetch_many(missing))
+    return pages
 
-    if search_result is None:
-        # If the class name is not found, skip this row
+
+def update_row(row, course):
+    """Fill in a row from its course (None if not offered) and return the course's UG reqs."""
+    if course is None:
+        # If the class name is not found, mark it as not offered
         row["Aut"] = row["Win"] = row["Spr"] = "FALSE"
-        continue
+        return []
 
     # Get the courseTitle if not already in the CSV
     if row["Title"] == "":
-        class_title = search_result.find("span", {"class": "courseTitle"}).text  # type: ignore
-        row["Title"] = class_title
-
-    # Get the class quarters by extracting the relevant text from e.g.
-    # <div class="courseAttributes">   Terms: Win | Units: 3-4</div>
-    terms_string = search_result.find("div", {"class": "courseAttributes"}).text  # type: ignore
-    terms_string = terms_string.split("Terms:")[1].split("\r")[0].strip()
+        row["Title"] = course.title
 
-    # Write the terms we found
+    # Write the terms we found (e.g. "Aut, Win" from "Terms: Aut, Win | Units: 3-4")
     for term_name in ["Aut", "Win", "Spr"]:
-        if term_name in terms_string:
+        if term_name in course.terms:
             row[term_name] = "TRUE"
         else:
             row[term_name] = "FALSE"
+    return course.ug_reqs
+
+
+def main():
+    """Main function."""
+    args = parse_args()
+    enable_from_args(args)
+
+    # File selection
+    input_file = args.input_file or input("Enter the path of a CSV file...\n")
+    # input_file = './Classes I Want To Take - Gabe Mukobi - Classes.csv'
+
+    # Format filename to avoid invalid arguments (e.g. \\ on Windows, remove quotes)
+    input_file = input_file.replace("\\", "/").replace('"', "").replace("'", "")
+
+    # Load in CSV data
+    header_rows, input_data, fieldnames = load_rows(input_file)
+
+    # Debug: Only do a few rows
+    # input_data = input_data[450:]
+
+    # Store the UG-reqs requirements as a dictionary to print at the end
+    # E.g. {'WAY-AQR': ['ENGR 76', ...], ...}
+    # Don't write them to the file so the user can pick which ones are important or not.
+    all_ug_reqs = {}
+    # ... and by class, saved with each checkpoint so --resume knows them for rows it skips
+    class_ug_reqs = {}
+
+    # Completed rows are journaled as they finish so a crash doesn't lose them
+    journal = RowJournal(input_file)
+    journal_entries = journal.load() if args.resume else {}
+    saved_ug_reqs = load_ug_reqs(input_file) if args.resume else {}
+    if not args.resume:
+        journal.remove()
+
+    rows_to_do = []
+    num_unknown_ug_reqs = 0
+    for index, row in enumerate(input_data):
+        entry = journal_entries.get(index)
+        if entry is not None and entry["Class"] == row["Class"]:
+            # Finished before the last run crashed
+            row.update(entry["values"])
+            class_ug_reqs[row["Class"]] = entry["ug_reqs"]
+            add_ug_reqs(all_ug_reqs, row["Class"], entry["ug_reqs"])
+        elif args.resume and all(row[term_name] for term_name in ["Aut", "Win", "Spr"]):
+            # Already filled in by an earlier completed run
+            if row["Class"] in saved_ug_reqs:
+                class_ug_reqs[row["Class"]] = saved_ug_reqs[row["Class"]]
+                add_ug_reqs(all_ug_reqs, row["Class"], saved_ug_reqs[row["Class"]])
+            else:
+                num_unknown_ug_reqs += 1
+        else:
+            rows_to_do.append((index, row))
+    if args.resume:
+        print(f"Resuming: {len(input_data) - len(rows_to_do)}/{len(input_data)} rows already done")
+        if num_unknown_ug_reqs:
+            print(f"{num_unknown_ug_reqs} of them have no saved UG reqs, so they're missing from the summary "
+                  "(run without --resume to include them)")
+
+    def checkpoint():
+        with stage("write"):
+            write_csv_atomic(input_file, header_rows + input_data, fieldnames)
+            write_ug_reqs_atomic(input_file, class_ug_reqs)
+
+    # Remove any spaces in the class names (e.g. CS 224N -> CS224N)
+    class_names = {row["Class"].replace(" ", ""): row["Class"] for _, row in rows_to_do}
+    pages = fetch_pages(args, class_names)
+
+    from tqdm import tqdm
+
+    # For each row
+    num_completed = 0
+    for index, row in tqdm(rows_to_do):
+        # Get the class name
+        class_name = row["Class"]
+        class_name_nospace = class_name.replace(" ", "")
+
+        # Get the class quarters
+        page = pages[class_name_nospace]
+        if page is None:
+            # The request failed, so leave the row as it was (and retry it on --resume)
+            continue
+
+        ug_reqs = update_row(row, find_course(page, class_name_nospace))
+        class_ug_reqs[class_name] = ug_reqs
+        add_ug_reqs(all_ug_reqs, class_name, ug_reqs)
+
+        # Record the finished row, and periodically checkpoint the whole CSV
+        journal.append(
+            {
+                "index": index,
+                "Class": class_name,
+                "values": {key: row[key] for key in ["Title", "Aut", "Win", "Spr"]},
+                "ug_reqs": ug_reqs,
+            }
+        )
+        num_completed += 1
+        count("rows_completed")
+        if num_completed % args.checkpoint_every == 0:
+            checkpoint()
+
+    # Write the output file, then drop the journal now that everything is saved
+    checkpoint()
+    journal.remove()
+
+    # Alphabetize and print the UG requirements
+    print("### Requirements Satisfied by Courses ###\n")
+    for req_name, req_classes in sorted(all_ug_reqs.items()):
+        classes_string = "\n".join(sorted(req_classes))
+        print(f"## {req_name} ({len(req_classes)}) ##\n{classes_string}\n")
+
 
-    # Get the UG Requirements (text between 'UG Reqs:' and '\n')
-    ug_reqs_string = search_result.find("div", {"class": "courseAttributes"}).text  # type: ignore
-    ug_reqs_string = ug_reqs_string.split("UG Reqs:")
-    if len(ug_reqs_string) > 1:
-        ug_reqs_string = ug_reqs_string[1].split("\r")[0].strip()
-        ug_reqs_for_this_class = ug_reqs_string.split(", ")
-
-        # Add class to dictionary for each UG req
-        for ug_req in ug_reqs_for_this_class:
-            if ug_req not in all_ug_reqs:
-                all_ug_reqs[ug_req] = []
-            all_ug_reqs[ug_req].append(class_name)
-
-
-# Write the output file
-with open(INPUT_FILE, "w", newline="\n", encoding="utf-8") as file:
-    writer = csv.DictWriter(file, fieldnames=input_data[0].keys())
-    writer.writeheader()
-    for row in input_data:
-        writer.writerow(row)
-
-# Alphabetize and print the UG requirements
-print("### Requirements Satisfied by Courses ###\n")
-for req_name, req_classes in sorted(all_ug_reqs.items()):
-    classes_string = "\n".join(sorted(req_classes))
-    print(f"## {req_name} ({len(req_classes)}) ##\n{classes_string}\n")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Availability as integer bitsets over students.
+
+Bit i of a slot's mask is set when student i is available at that slot, so the
+students who can make any of a set of section times is the OR of those times'
+masks, and how many of them there are is its popcount. Python ints are
+arbitrary-precision, so this works for any number of students.
+"""
+
+import functools
+
+from propose_discussion_sections import compare_times
+
+
+# Number of set bits (students) in a mask
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+
+    def popcount(mask):
+        return bin(mask).count("1")
+
+
+def iter_bits(mask):
+    """Indices of the set bits of a mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def sort_slots(slots):
+    """Slots (e.g. 'M 3:00-4:20 PM') in chronological order."""
+    return sorted(slots, key=functools.cmp_to_key(compare_times))
+
+
+def slot_student_masks(students):
+    """{slot: mask of the students available then} for every slot any student is available."""
+    masks = {}
+    for i, (_, availability) in enumerate(students):
+        for slot in availability:
+            masks[slot] = masks.get(slot, 0) | (1 << i)
+    return masks
+
+
+def union(masks):
+    """OR of many masks."""
+    result = 0
+    for mask in masks:
+        result |= mask
+    return result
+
+
+def add_to_counters(counters, mask):
+    """
+    Bit-sliced saturating counters: counters[j] holds the students seen in more than
+    j of the masks added so far. Returns the counters after also adding mask.
+    """
+    added = [counters[0] | mask]
+    for j in range(1, len(counters)):
+        added.append(counters[j] | (counters[j - 1] & mask))
+    return added
+
+
+def at_least(masks, k):
+    """Mask of the students who are in at least k of the masks."""
+    counters = [0] * k
+    for mask in masks:
+        counters = add_to_counters(counters, mask)
+    return counters[-1]
+
+
+def students_in(mask, students):
+    """Names of the students in a mask."""
+    return [students[i][0] for i in iter_bits(mask)]
+
+
+def can_fill_sections(section_masks, min_group_size):
+    """
+    Whether every section can get min_group_size different students of its own.
+
+    section_masks holds, for each section, the mask of students available at its
+    time. This is a bipartite matching of students to min_group_size seats per
+    section (Kuhn's augmenting paths), since a student can only fill one seat.
+    """
+    seats = [mask for mask in section_masks for _ in range(min_group_size)]
+    if popcount(union(section_masks)) < len(seats):
+        return False
+    seat_of_student = {}
+
+    def assign(seat, visited):
+        for student in iter_bits(seats[seat]):
+            if visited[0] >> student & 1:
+                continue
+            visited[0] |= 1 << student
+            if student not in seat_of_student or assign(seat_of_student[student], visited):
+                seat_of_student[student] = seat
+                return True
+        return False
+
+    return all(assign(seat, [0]) for seat in range(len(seats)))
@@ -0,0 +1,235 @@
+"""
+Scaling benchmark for the discussion section CSP solver.
+
+Generates synthetic availability CSVs in the same format as the Airtable form
+export, then runs propose_discussion_sections.py's read/build/solve steps over a
+grid of roster sizes and records wall time, peak memory and solution counts.
+Each case runs in its own process with a hard timeout, and the solution search
+is capped, so one blown-up case can't stall the whole grid. The solver's lazy
+imports are loaded before the timers start, and memory is the process's peak
+resident set size (not tracemalloc, which would slow the timed steps down).
+
+Usage:
+    python benchmark_solver.py --students 4 6 8 --facilitators 1 2 --slots 6 10 --density 0.3 0.5
+    python benchmark_solver.py --generate roster.csv --students 30 --facilitators 4 --slots 12
+"""
+
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+import random
+import tempfile
+import sys
+import time
+from queue import Empty
+
+from propose_discussion_sections import build_problem, read_availability, solve
+
+# Section times in the form's format (e.g. 'M 3:00-4:20 PM'), in chronological order
+DAYS = ["M", "Tu", "W", "Th", "F"]
+TIMES = ["9:00-10:20 AM", "10:30-11:50 AM", "12:00-1:20 PM", "1:30-2:50 PM", "3:00-4:20 PM", "4:30-5:50 PM", "6:00-7:20 PM"]
+ALL_SLOTS = [f"{day} {times}" for day, times in itertools.product(DAYS, TIMES)]
+
+FIELDNAMES = ["Full Name", "Are you a student or a facilitator?", "Availability", "Chosen num sections"]
+RESULT_FIELDNAMES = [
+    "students",
+    "facilitators",
+    "sections_per_facilitator",
+    "slots",
+    "density",
+    "seed",
+    "status",
+    "solutions",
+    "complete",
+    "possible_configurations",
+    "read_seconds",
+    "build_seconds",
+    "solve_seconds",
+    "peak_rss_mb",
+    "solution_density",
+]
+
+
+def generate_roster(path, num_students, num_facilitators, sections_per_facilitator, num_slots, density, seed=0):
+    """
+    Write a synthetic availability CSV.
+
+    Everyone is available at each of the first num_slots slots independently with
+    probability density (and at least one slot). Returns the slots used.
+    """
+    if num_slots > len(ALL_SLOTS):
+        raise ValueError(f"At most {len(ALL_SLOTS)} slots are supported, got {num_slots}")
+    rng = random.Random(seed)
+    slots = ALL_SLOTS[:num_slots]
+
+    def availability():
+        available = [slot for slot in slots if rng.random() < density]
+        return available or [rng.choice(slots)]
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for i in range(num_facilitators):
+            writer.writerow({
+                "Full Name": f"Facilitator {i + 1}",
+                "Are you a student or a facilitator?": "Facilitator",
+                "Availability": ",".join(availability()),
+                "Chosen num sections": sections_per_facilitator,
+            })
+        for i in range(num_students):
+            writer.writerow({
+                "Full Name": f"Student {i + 1}",
+                "Are you a student or a facilitator?": "Student",
+                "Availability": ",".join(availability()),
+                "Chosen num sections": "",
+            })
+    return slots
+
+
+def peak_rss_mb():
+    """This process's peak resident set size in MB, or None where the resource module is missing (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KB elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def run_case(path, args):
+    """Read, build and solve one roster, returning its measurements."""
+    # Load what build_problem() and solve() import lazily, so their import cost isn't timed
+    import constraint  # noqa: F401  pylint: disable=unused-import,import-outside-toplevel
+    import tqdm  # noqa: F401  pylint: disable=unused-import,import-outside-toplevel
+
+    started = time.perf_counter()
+    students, facilitators = read_availability(path)
+    read_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    problem, _, possible_configurations = build_problem(
+        students,
+        facilitators,
+        args.min_group_size,
+        args.max_student_availability,
+        args.min_student_availability,
+        verbose=False,
+    )
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    solutions, complete = solve(problem, possible_configurations, args.max_solutions, progress=False)
+    solve_seconds = time.perf_counter() - started
+
+    return {
+        "status": "ok",
+        "solutions": len(solutions),
+        "complete": complete,
+        "possible_configurations": possible_configurations,
+        "read_seconds": read_seconds,
+        "build_seconds": build_seconds,
+        "solve_seconds": solve_seconds,
+        # Includes the interpreter and imports, which are the same for every case
+        "peak_rss_mb": peak_rss_mb(),
+        "solution_density": len(solutions) / possible_configurations if complete else None,
+    }
+
+
+def _run_case_into_queue(path, args, queue):
+    try:
+        queue.put(run_case(path, args))
+    except Exception as exc:  # pylint: disable=broad-except
+        queue.put({"status": f"error: {exc}"})
+
+
+def run_case_with_timeout(path, args):
+    """run_case() in a child process, killed after args.timeout seconds."""
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_case_into_queue, args=(path, args, queue))
+    process.start()
+    try:
+        return queue.get(timeout=args.timeout)
+    except Empty:
+        return {"status": "timeout"}
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return "" if value is None else str(value)
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Benchmark the discussion section solver on synthetic rosters.")
+    parser.add_argument("--students", type=int, nargs="+", default=[4, 6, 8], help="Numbers of students")
+    parser.add_argument("--facilitators", type=int, nargs="+", default=[1, 2], help="Numbers of facilitators")
+    parser.add_argument("--sections", type=int, nargs="+", default=[1], help="Sections per facilitator")
+    parser.add_argument("--slots", type=int, nargs="+", default=[6, 10], help="Numbers of possible section times")
+    parser.add_argument("--density", type=float, nargs="+", default=[0.3, 0.5],
+                        help="Probability that someone is available at each slot")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0], help="Roster seeds (repeats of each case)")
+    parser.add_argument("--min-group-size", type=int, default=1, help="Smallest valid section")
+    parser.add_argument("--min-student-availability", type=int, default=0,
+                        help="Drop students with fewer available times than this (default: keep everyone)")
+    parser.add_argument("--max-student-availability", type=int, default=len(ALL_SLOTS),
+                        help="Drop students with more available times than this (default: keep everyone)")
+    parser.add_argument("--max-solutions", type=int, default=100000, help="Stop each search after this many solutions")
+    parser.add_argument("--timeout", type=float, default=60, help="Kill each case after this many seconds")
+    # Not in this folder, where propose_discussion_sections.py looks for the one input CSV
+    parser.add_argument("--output", default=os.path.join("benchmarks", "solver_benchmark.csv"),
+                        help="Where to write the results")
+    parser.add_argument("--roster-dir", help="Keep the generated rosters in this folder")
+    parser.add_argument("--generate", metavar="CSV", help="Just write one roster (first value of each option) and exit")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_roster(args.generate, args.students[0], args.facilitators[0], args.sections[0],
+                        args.slots[0], args.density[0], args.seeds[0])
+        print(f"Wrote {args.generate}")
+        return
+
+    roster_dir = args.roster_dir or tempfile.mkdtemp(prefix="solver_benchmark_")
+    os.makedirs(roster_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+    grid = list(itertools.product(args.students, args.facilitators, args.sections, args.slots, args.density, args.seeds))
+    print(" ".join(f"{name:>10.10}" for name in RESULT_FIELDNAMES))
+    with open(args.output, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDNAMES)
+        writer.writeheader()
+        for num_students, num_facilitators, sections, num_slots, density, seed in grid:
+            path = os.path.join(
+                roster_dir, f"roster_{num_students}s_{num_facilitators}f_{sections}x_{num_slots}t_{density:g}d_{seed}.csv"
+            )
+            generate_roster(path, num_students, num_facilitators, sections, num_slots, density, seed)
+
+            result = {
+                "students": num_students,
+                "facilitators": num_facilitators,
+                "sections_per_facilitator": sections,
+                "slots": num_slots,
+                "density": density,
+                "seed": seed,
+            }
+            result.update(run_case_with_timeout(path, args))
+            writer.writerow(result)
+            f.flush()
+            print(" ".join(f"{format_value(result.get(name)):>10.10}" for name in RESULT_FIELDNAMES))
+
+    if not args.roster_dir:
+        for filename in os.listdir(roster_dir):
+            os.remove(os.path.join(roster_dir, filename))
+        os.rmdir(roster_dir)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
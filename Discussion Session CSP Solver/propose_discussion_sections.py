@@ -5,17 +5,17 @@ Then, if you choose those times for the sections, you have more choice in the st
 Rather idiosyncratic to SAIA's class scheduling form: https://airtable.com/shrl6KTTzPVNyLzmi
 """
 
+import argparse
 import colorsys
 import os
+import sys
 import csv
 import functools
+import time
 from datetime import datetime
 
-from matplotlib import pyplot as plt
-
-import constraint
-
-from tqdm import tqdm
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from script_utils.instrumentation import add_profile_argument, count, enable_from_args, stage  # noqa: E402
 
 # Parameters
 # Groups with fewer than this number of students are invalid.
@@ -30,163 +30,164 @@ EST_SOLUTION_DENSITY = 8364 / 22617340087890625000
 PRINT_SOLUTIONS = False
 
 
-# Find whatever CSV file is in the local folder using list comprehension
-INPUT_FILE = [f for f in os.listdir(".") if f.endswith(".csv")]
-if len(INPUT_FILE) == 1:
-    INPUT_FILE = INPUT_FILE[0]
-elif len(INPUT_FILE) == 0:
-    INPUT_FILE = input("Enter the path of the CSV file: ").strip().strip('"').strip("'")
-else:
-    raise ValueError(f"Multiple input files found:\n{INPUT_FILE}")
-
-# Read in data
-students = []
-facilitators = []
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        name = row["Full Name"]
-        role = row["Are you a student or a facilitator?"]
-        availability = set(row["Availability"].split(","))
-        if role == "Student":
-            students.append((name, availability))
-        elif role == "Facilitator":
-            # Duplicate the facilitator for each number of groups they can facilitate
-            try:
-                num_groups = int(row["Chosen num sections"])
-            except ValueError as exc:
-                raise ValueError(
-                    f'Invalid number of groups for {name} (please enter manually): {row["Chosen num sections"]}'
-                ) from exc
-            for i in range(num_groups):
-                facilitators.append((f"{name} {i+1}", availability))
-        else:
-            raise ValueError(role)
-
-# Create CSP
-problem = constraint.Problem(constraint.BacktrackingSolver())
-
-# Count the number of variable configurations to estimate progress
-possible_configurations = 1
-
-# Add variables: each faciltator chooses a time
-for facilitator in facilitators:
-    name, availability = facilitator
-    availability = list(availability)
-    problem.addVariable(name, availability)
-    possible_configurations *= len(availability)
-
-facilitator_names = [name for name, _ in facilitators]
-print(f'Facilitators: {", ".join(facilitator_names)}')
-
-# Add variables: each student chooses a facilitator
-num_students_removed_too_much = 0
-num_students_removed_too_little = 0
-filtered_students = []
-for student in students:
-    name, availability = student
-    # Filter the students to remove students with too much or little availability to make the problem easier
-    if len(availability) > MAX_STUDENT_AVAILABILITY:
-        num_students_removed_too_much += 1
-        continue
-    if len(availability) < MIN_STUDENT_AVAILABILITY:
-        num_students_removed_too_little += 1
-        continue
-    possible_configurations *= len(facilitator_names)
-    problem.addVariable(name, facilitator_names)
-    filtered_students.append(student)
-
-student_names = [name for name, _ in filtered_students]
-
-print(
-    f"Removed {num_students_removed_too_much}/{len(students)} students with more than {MAX_STUDENT_AVAILABILITY} availabilities."
-)
-print(
-    f"Removed {num_students_removed_too_little}/{len(students)} students with fewer than {MIN_STUDENT_AVAILABILITY} availabilities."
-)
-
-print(f"Total possible configurations: {possible_configurations}")
-
-# Add constraint: For each student, they must be available at the time
-# that their facilitator has chosen.
-for student in filtered_students:
-    student_name, student_availability = student
-
-    def build_availability_constraint(student_availability):
-        def constraint_func(chosen_facilitator, *facilitator_times):
-            facilitator_time = facilitator_times[
-                facilitator_names.index(chosen_facilitator)
-            ]
-            return facilitator_time in student_availability
-
-        return constraint_func
-
-    problem.addConstraint(
-        build_availability_constraint(student_availability),
-        (student_name, *facilitator_names),
-    )
-
-# Add constraint: For each facilitator, they must have at least MIN_GROUP_SIZE students.
-# Implemented as for each facilitator, the number of students choosing them is at least MIN_GROUP_SIZE.
-for facilitator_name in facilitator_names:
+def find_input_file(input_file=None):
+    """The given CSV path, else whatever CSV file is in the local folder (prompting if there's none)."""
+    if input_file:
+        return input_file.strip().strip('"').strip("'")
+    input_files = [f for f in os.listdir(".") if f.endswith(".csv")]
+    if len(input_files) == 1:
+        return input_files[0]
+    elif len(input_files) == 0:
+        return input("Enter the path of the CSV file: ").strip().strip('"').strip("'")
+    else:
+        raise ValueError(f"Multiple input files found:\n{input_files}")
+
+
+def read_availability(input_file):
+    """Read the form export into (students, facilitators) lists of (name, set of times)."""
+    students = []
+    facilitators = []
+    with open(input_file, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            name = row["Full Name"]
+            role = row["Are you a student or a facilitator?"]
+            availability = set(row["Availability"].split(","))
+            if role == "Student":
+                students.append((name, availability))
+            elif role == "Facilitator":
+                # Duplicate the facilitator for each number of groups they can facilitate
+                try:
+                    num_groups = int(row["Chosen num sections"])
+                except ValueError as exc:
+                    raise ValueError(
+                        f'Invalid number of groups for {name} (please enter manually): {row["Chosen num sections"]}'
+                    ) from exc
+                for i in range(num_groups):
+                    facilitators.append((f"{name} {i+1}", availability))
+            else:
+                raise ValueError(role)
+    return students, facilitators
+
+
+def build_problem(
+    students,
+    facilitators,
+    min_group_size=MIN_GROUP_SIZE,
+    max_student_availability=MAX_STUDENT_AVAILABILITY,
+    min_student_availability=MIN_STUDENT_AVAILABILITY,
+    verbose=True,
+):
+    """
+    Build the CSP: each facilitator chooses a time and each student chooses a facilitator.
+
+    Returns (problem, facilitator names, possible configurations).
+    """
+    import constraint
+
+    problem = constraint.Problem(constraint.BacktrackingSolver())
+
+    # Count the number of variable configurations to estimate progress
+    possible_configurations = 1
+
+    # Add variables: each faciltator chooses a time
+    for facilitator in facilitators:
+        name, availability = facilitator
+        availability = list(availability)
+        problem.addVariable(name, availability)
+        possible_configurations *= len(availability)
+
+    facilitator_names = [name for name, _ in facilitators]
+    if verbose:
+        print(f'Facilitators: {", ".join(facilitator_names)}')
+
+    # Add variables: each student chooses a facilitator
+    num_students_removed_too_much = 0
+    num_students_removed_too_little = 0
+    filtered_students = []
+    for student in students:
+        name, availability = student
+        # Filter the students to remove students with too much or little availability to make the problem easier
+        if len(availability) > max_student_availability:
+            num_students_removed_too_much += 1
+            continue
+        if len(availability) < min_student_availability:
+            num_students_removed_too_little += 1
+            continue
+        possible_configurations *= len(facilitator_names)
+        problem.addVariable(name, facilitator_names)
+        filtered_students.append(student)
+
+    student_names = [name for name, _ in filtered_students]
+
+    if verbose:
+        print(
+            f"Removed {num_students_removed_too_much}/{len(students)} students with more than {max_student_availability} availabilities."
+        )
+        print(
+            f"Removed {num_students_removed_too_little}/{len(students)} students with fewer than {min_student_availability} availabilities."
+        )
+
+        print(f"Total possible configurations: {possible_configurations}")
+
+    # Add constraint: For each student, they must be available at the time
+    # that their facilitator has chosen.
+    for student in filtered_students:
+        student_name, student_availability = student
+
+        def build_availability_constraint(student_availability):
+            def constraint_func(chosen_facilitator, *facilitator_times):
+                facilitator_time = facilitator_times[
+                    facilitator_names.index(chosen_facilitator)
+                ]
+                return facilitator_time in student_availability
+
+            return constraint_func
+
+        problem.addConstraint(
+            build_availability_constraint(student_availability),
+            (student_name, *facilitator_names),
+        )
+
+    # Add constraint: For each facilitator, they must have at least min_group_size students.
+    # Implemented as for each facilitator, the number of students choosing them is at least min_group_size.
+    for facilitator_name in facilitator_names:
+
+        def build_size_constraint_func(facilitator_name):
+            def constraint_func(*facilitator_choices):
+                students_in_this_group = len(
+                    [choice for choice in facilitator_choices if choice == facilitator_name]
+                )
+                return students_in_this_group >= min_group_size
+
+            return constraint_func
+
+        problem.addConstraint(build_size_constraint_func(facilitator_name), student_names)
+
+    return problem, facilitator_names, possible_configurations
+
+
+def solve(problem, possible_configurations, max_solutions=None, time_limit=None, progress=True):
+    """
+    Find every solution, showing a count of the number of solutions iteratively.
+
+    Stops early after max_solutions solutions or time_limit seconds (checked as
+    each solution is found). Returns (solutions, whether every solution was found).
+    """
+    from tqdm import tqdm
+
+    solutions = []
+    est_num_solutions = EST_SOLUTION_DENSITY * possible_configurations
+    deadline = time.perf_counter() + time_limit if time_limit else None
+    for solution in tqdm(problem.getSolutionIter(), total=est_num_solutions, disable=not progress):
+        solutions.append(solution)
+        # print(f'Found {len(solutions)} solutions! Progress: {len(solutions) / est_num_solutions * 100:.2f}%', end='\r')
+        if max_solutions and len(solutions) >= max_solutions:
+            return solutions, False
+        if deadline and time.perf_counter() > deadline:
+            return solutions, False
+    return solutions, True
 
-    def build_size_constraint_func(facilitator_name):
-        def constraint_func(*facilitator_choices):
-            students_in_this_group = len(
-                [choice for choice in facilitator_choices if choice == facilitator_name]
-            )
-            return students_in_this_group >= MIN_GROUP_SIZE
-
-        return constraint_func
-
-    problem.addConstraint(build_size_constraint_func(facilitator_name), student_names)
-
-# Solve CSP, showing a count of the number of solutions iteratively
-solutions = []
-est_num_solutions = EST_SOLUTION_DENSITY * possible_configurations
-for solution in tqdm(problem.getSolutionIter(), total=est_num_solutions):
-    solutions.append(solution)
-    # print(f'Found {len(solutions)} solutions! Progress: {len(solutions) / est_num_solutions * 100:.2f}%', end='\r')
-
-print(f"Found {len(solutions)} solutions!")
-
-if len(solutions) == 0:
-    print("No solutions found :(")
-    exit()
-
-if PRINT_SOLUTIONS:
-    # Print solutions
-    for i, solution in enumerate(solutions):
-        print(f"Solution {i + 1}:")
-        for student, time in solution.items():
-            print(f"{student}: {time}")
-        print()
-        if i + 1 >= 2:
-            break
-
-    print("No more solutions found.")
-
-# For each facilitator, get the times from all the solutions.
-facilitator_solution_times = []
-for facilitator_name in facilitator_names:
-    times = [solution[facilitator_name] for solution in solutions]
-    facilitator_solution_times.append((facilitator_name, times))
-
-    # Print the sum of each time
-    time_counts = {}
-    for time in times:
-        if time not in time_counts:
-            time_counts[time] = 0
-        time_counts[time] += 1
-    for time, count in time_counts.items():
-        print(f"{facilitator_name} - {time}: {count}")
-
-# Extract unique times from all facilitators' times lists
-unique_times = set()
-for facilitator, times in facilitator_solution_times:
-    for time in times:
-        unique_times.add(time)
-unique_times = list(unique_times)
 
 # A custom comparison function. Expects times formatted like 'M 3:00-4:20 PM'
 
@@ -211,56 +212,176 @@ def compare_times(t1, t2):
             return 0
 
 
-# Convert times to datetime objects and sort by date and time.
-unique_times = sorted(unique_times, key=functools.cmp_to_key(compare_times))
-
-# Plot a histogram of the times that most often occured
-# in the solutions. Shows the graphs at the same time.
-
-# Reduce the font of everything
-plt.rcParams.update({"font.size": 7, "figure.figsize": (10, 10)})
-
-# Plot histograms for each facilitator
-fig, ax = plt.subplots(
-    nrows=len(facilitator_solution_times), ncols=1, sharey=True, sharex=True
-)
-for i, (facilitator_name, times) in enumerate(facilitator_solution_times):
-    # Count occurrences of each time in facilitator's times list
-    time_counts = {time: times.count(time) for time in unique_times}
-
-    # Plot a bar for each time
-    ax[i].bar(
-        list(time_counts.keys()),
-        list(time_counts.values()),
-        label=facilitator_name,
-        width=0.95,
-        align="center",
-        edgecolor="black",
-        linewidth=0.5,
-        color="#444",
-    )
-    # Color this plot with a hue based on i
-    ax[i].set_facecolor(
-        colorsys.hsv_to_rgb(i / len(facilitator_solution_times), 0.28, 0.93)
-    )
-    ax[i].set_ylabel("Count")
-    ax[i].legend()
-    ax[i].grid()
-
+def plot_facilitator_times(facilitator_solution_times, unique_times, output_path, show=True):
+    """
+    Plot a histogram of the times that most often occured
+    in the solutions. Shows the graphs at the same time.
+    """
+    from matplotlib import pyplot as plt
 
-# Make sure there is an x-label for every bin
-fig.align_xlabels()
-plt.xticks(unique_times, rotation=15, horizontalalignment="right")
+    # Reduce the font of everything
+    plt.rcParams.update({"font.size": 7, "figure.figsize": (10, 10)})
 
-# Log-y
-plt.yscale("log")
-
-# Get rid of the space between the title and the first subplot
-fig.subplots_adjust(top=0.95)
-
-fig.suptitle("Facilitator Times - Number of CSP Solutions")
-
-# Save the plot to a file, but big and zoomed out so it's readable.
-fig.savefig("facilitator_times.png", dpi=300, bbox_inches="tight", pad_inches=0.05)
-
-plt.show()
+    # Plot histograms for each facilitator
+    fig, ax = plt.subplots(
+        nrows=len(facilitator_solution_times), ncols=1, sharey=True, sharex=True, squeeze=False
+    )
+    ax = ax[:, 0]
+    for i, (facilitator_name, times) in enumerate(facilitator_solution_times):
+        # Count occurrences of each time in facilitator's times list
+        time_counts = {time_slot: times.count(time_slot) for time_slot in unique_times}
+
+        # Plot a bar for each time
+        ax[i].bar(
+            list(time_counts.keys()),
+            list(time_counts.values()),
+            label=facilitator_name,
+            width=0.95,
+            align="center",
+            edgecolor="black",
+            linewidth=0.5,
+            color="#444",
+        )
+        # Color this plot with a hue based on i
+        ax[i].set_facecolor(
+            colorsys.hsv_to_rgb(i / len(facilitator_solution_times), 0.28, 0.93)
+        )
+        ax[i].set_ylabel("Count")
+        ax[i].legend()
+        ax[i].grid()
+
+    # Make sure there is an x-label for every bin
+    fig.align_xlabels()
+    plt.xticks(unique_times, rotation=15, horizontalalignment="right")
+
+    # Log-y
+    plt.yscale("log")
+
+    # Get rid of the space between the title and the first subplot
+    fig.subplots_adjust(top=0.95)
+
+    fig.suptitle("Facilitator Times - Number of CSP Solutions")
+
+    # Save the plot to a file, but big and zoomed out so it's readable.
+    fig.savefig(output_path, dpi=300, bbox_inches="tight", pad_inches=0.05)
+
+    if show:
+        plt.show()
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input_file", nargs="?", help="Availability CSV (default: the one CSV in this folder)")
+    parser.add_argument("--min-group-size", type=int, default=MIN_GROUP_SIZE, help="Smallest valid section")
+    parser.add_argument(
+        "--max-student-availability",
+        type=int,
+        default=MAX_STUDENT_AVAILABILITY,
+        help="Drop students with more available times than this",
+    )
+    parser.add_argument(
+        "--min-student-availability",
+        type=int,
+        default=MIN_STUDENT_AVAILABILITY,
+        help="Drop students with fewer available times than this",
+    )
+    parser.add_argument("--print-solutions", action="store_true", default=PRINT_SOLUTIONS, help="Print the first solutions")
+    parser.add_argument("--max-solutions", type=int, default=None, help="Stop after this many solutions")
+    parser.add_argument("--time-limit", type=float, default=None, help="Stop searching after this many seconds")
+    parser.add_argument(
+        "--optimize",
+        type=int,
+        nargs="?",
+        const=5,
+        metavar="TOP_K",
+        help="Search for the TOP_K best schedules directly (see section_optimizer.py) instead of enumerating solutions",
+    )
+    parser.add_argument("--output", default="facilitator_times.png", help="Where to save the histogram")
+    parser.add_argument("--no-show", action="store_true", help="Save the plot without opening a window")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    enable_from_args(args)
+
+    # Read in data
+    with stage("read"):
+        students, facilitators = read_availability(find_input_file(args.input_file))
+
+    if args.optimize:
+        from section_optimizer import optimize_schedules, print_schedules
+
+        with stage("optimize"):
+            results, complete = optimize_schedules(
+                students, facilitators, args.min_group_size, args.optimize, args.time_limit
+            )
+        if not complete:
+            print("Time limit hit, so these may not be optimal.")
+        if not results:
+            print("No feasible schedules :(")
+            return
+        print_schedules(results, students, facilitators)
+        return
+
+    # Create CSP
+    with stage("build_csp"):
+        problem, facilitator_names, possible_configurations = build_problem(
+            students,
+            facilitators,
+            args.min_group_size,
+            args.max_student_availability,
+            args.min_student_availability,
+        )
+
+    # Solve CSP
+    with stage("solve"):
+        solutions, complete = solve(problem, possible_configurations, args.max_solutions, args.time_limit)
+    print(f"Found {len(solutions)} solutions!" if complete else f"Stopped early after {len(solutions)} solutions.")
+    count("solutions", len(solutions))
+
+    if len(solutions) == 0:
+        print("No solutions found :(")
+        return
+
+    if args.print_solutions:
+        # Print solutions
+        for i, solution in enumerate(solutions):
+            print(f"Solution {i + 1}:")
+            for student, time_slot in solution.items():
+                print(f"{student}: {time_slot}")
+            print()
+            if i + 1 >= 2:
+                break
+
+        print("No more solutions found.")
+
+    # For each facilitator, get the times from all the solutions.
+    facilitator_solution_times = []
+    for facilitator_name in facilitator_names:
+        times = [solution[facilitator_name] for solution in solutions]
+        facilitator_solution_times.append((facilitator_name, times))
+
+        # Print the sum of each time
+        time_counts = {}
+        for time_slot in times:
+            if time_slot not in time_counts:
+                time_counts[time_slot] = 0
+            time_counts[time_slot] += 1
+        for time_slot, num_solutions in time_counts.items():
+            print(f"{facilitator_name} - {time_slot}: {num_solutions}")
+
+    # Extract unique times from all facilitators' times lists
+    unique_times = set()
+    for facilitator, times in facilitator_solution_times:
+        for time_slot in times:
+            unique_times.add(time_slot)
+    unique_times = list(unique_times)
+
+    # Convert times to datetime objects and sort by date and time.
+    unique_times = sorted(unique_times, key=functools.cmp_to_key(compare_times))
+
+    with stage("plot"):
+        plot_facilitator_times(facilitator_solution_times, unique_times, args.output, show=not args.no_show)
+
+
+if __name__ == "__main__":
+    main()
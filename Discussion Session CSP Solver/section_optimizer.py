@@ -0,0 +1,170 @@
+"""
+Directly search for the best discussion section times instead of counting CSP solutions.
+
+Each facilitator section picks one of its available times. A schedule is scored
+by how many students can make at least one of the chosen times (every such
+student can then join a section), breaking ties by the minimum slack: how many
+students are available per section at its time beyond MIN_GROUP_SIZE. Schedules
+where some section can't get MIN_GROUP_SIZE students of its own are infeasible.
+
+The search is branch-and-bound over facilitator times with student bitsets (see
+availability_bitsets.py): a branch is pruned as soon as the students it covers
+plus everyone the remaining facilitators could still reach can't beat the k-th
+best schedule so far. Sections with the fewest options are decided first, and
+the times covering the most new students are tried first, so good schedules
+(and tight bounds) are found early.
+"""
+
+import argparse
+import heapq
+import itertools
+import time
+
+from availability_bitsets import can_fill_sections, popcount, slot_student_masks, sort_slots, students_in, union
+from propose_discussion_sections import MIN_GROUP_SIZE, find_input_file, read_availability
+
+TOP_K = 5
+# How often (in search nodes) to check the time limit
+CHECK_EVERY = 4096
+
+
+class _Section:
+    def __init__(self, name, facilitator, slots, masks):
+        self.name = name
+        # Sections of the same facilitator are interchangeable
+        self.facilitator = facilitator
+        self.slots = slots
+        self.masks = masks
+
+
+def build_sections(facilitators, slot_masks, min_group_size):
+    """The sections, ordered fewest options first, with only the times enough students can make."""
+    sections = []
+    for name, availability in facilitators:
+        slots = [slot for slot in sort_slots(availability) if popcount(slot_masks.get(slot, 0)) >= min_group_size]
+        # Facilitators are duplicated per section as "<name> <section number>"
+        facilitator = name.rsplit(" ", 1)[0]
+        sections.append(_Section(name, facilitator, slots, [slot_masks.get(slot, 0) for slot in slots]))
+    # Keep each facilitator's sections next to each other for the symmetry breaking
+    sections.sort(key=lambda section: (len(section.slots), section.facilitator))
+    return sections
+
+
+def min_slack(chosen_masks, min_group_size):
+    """Fewest students available per section beyond min_group_size, over the chosen times."""
+    sections_at = {}
+    for mask in chosen_masks:
+        sections_at[mask] = sections_at.get(mask, 0) + 1
+    return min(popcount(mask) // num_sections - min_group_size for mask, num_sections in sections_at.items())
+
+
+def optimize_schedules(students, facilitators, min_group_size=MIN_GROUP_SIZE, top_k=TOP_K, time_limit=None):
+    """
+    The top_k schedules by (students covered, min slack).
+
+    Returns (results, whether the search finished), where results are
+    (students covered, min slack, {section name: time}, mask of covered students)
+    tuples, best first. A facilitator's sections always get different times.
+    """
+    slot_masks = slot_student_masks(students)
+    sections = build_sections(facilitators, slot_masks, min_group_size)
+    if not sections or any(not section.slots for section in sections):
+        return [], True
+
+    # Everyone the sections from i onwards could possibly reach, for the bound
+    reach = [0] * (len(sections) + 1)
+    for i in range(len(sections) - 1, -1, -1):
+        reach[i] = reach[i + 1] | union(sections[i].masks)
+
+    best = []  # Min-heap of (score, tiebreak, chosen option indices, covered mask)
+    tiebreak = itertools.count()
+    chosen = []
+    deadline = time.perf_counter() + time_limit if time_limit else None
+    num_nodes = 0
+
+    class TimeUp(Exception):
+        pass
+
+    def consider(covered):
+        chosen_masks = [section.masks[j] for section, j in zip(sections, chosen)]
+        if not can_fill_sections(chosen_masks, min_group_size):
+            return
+        score = (popcount(covered), min_slack(chosen_masks, min_group_size))
+        entry = (score, next(tiebreak), list(chosen), covered)
+        if len(best) < top_k:
+            heapq.heappush(best, entry)
+        elif score > best[0][0]:
+            heapq.heapreplace(best, entry)
+
+    def search(i, covered):
+        nonlocal num_nodes
+        num_nodes += 1
+        if deadline and num_nodes % CHECK_EVERY == 0 and time.perf_counter() > deadline:
+            raise TimeUp
+        # Optimistic bound: everyone covered so far plus everyone the rest could reach
+        if len(best) == top_k and popcount(covered | reach[i]) < best[0][0][0]:
+            return
+        if i == len(sections):
+            consider(covered)
+            return
+
+        section = sections[i]
+        # Symmetry breaking: a facilitator's sections take their times in increasing order
+        first = chosen[-1] + 1 if i > 0 and sections[i - 1].facilitator == section.facilitator else 0
+        options = sorted(range(first, len(section.slots)), key=lambda j: -popcount(section.masks[j] & ~covered))
+        for j in options:
+            chosen.append(j)
+            search(i + 1, covered | section.masks[j])
+            chosen.pop()
+
+    complete = True
+    try:
+        search(0, 0)
+    except TimeUp:
+        complete = False
+
+    results = []
+    for (num_covered, slack), _, indices, covered in sorted(best, reverse=True):
+        schedule = {section.name: section.slots[j] for section, j in zip(sections, indices)}
+        results.append((num_covered, slack, schedule, covered))
+    return results, complete
+
+
+def print_schedules(results, students, facilitators):
+    """Print the schedules as Markdown, listing who can't make the best one."""
+    names = [name for name, _ in facilitators]
+    for rank, (num_covered, slack, schedule, covered) in enumerate(results, start=1):
+        print(f"## Schedule {rank}: {num_covered}/{len(students)} students, min slack {slack}")
+        for name in names:
+            print(f"- {name}: {schedule[name]}")
+        print()
+
+    if results:
+        all_students = (1 << len(students)) - 1
+        left_out = students_in(all_students & ~results[0][3], students)
+        print(f"Students who can't make any section of schedule 1: {', '.join(left_out) or 'none'}")
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input_file", nargs="?", help="Availability CSV (default: the one CSV in this folder)")
+    parser.add_argument("--min-group-size", type=int, default=MIN_GROUP_SIZE, help="Smallest valid section")
+    parser.add_argument("--top-k", type=int, default=TOP_K, help="How many schedules to report")
+    parser.add_argument("--time-limit", type=float, default=None, help="Report the best found after this many seconds")
+    args = parser.parse_args()
+
+    students, facilitators = read_availability(find_input_file(args.input_file))
+    started = time.perf_counter()
+    results, complete = optimize_schedules(students, facilitators, args.min_group_size, args.top_k, args.time_limit)
+    print(f"Searched in {time.perf_counter() - started:.2f}s" + ("" if complete else " (time limit hit, may not be optimal)"))
+    print()
+
+    if not results:
+        print("No feasible schedules :(")
+        return
+    print_schedules(results, students, facilitators)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,70 +2,191 @@
 For discussion group scheduling for Stanford AI Alignment classes.
 Given we've chosen some discussion section times for our facilitators,
 iterate over each student and print which facilitator groups they can make.
-"""
 
-import os
-import csv
+With --what-if, also score every combination of the facilitators' available
+times by how many students can make at least --at-least of the sections, and
+print the best sets next to the chosen one. If there are more than
+--max-combinations combinations, each section only keeps the times the most
+students can make.
+"""
 
-SORT_BY_AVAILABILITY_INSTEAD_OF_NAME = True
+import argparse
+import heapq
+import itertools
+import math
+import time
 
-# Find whatever CSV file is in the local folder using list comprehension
-# INPUT_FILE = [f for f in os.listdir(".") if f.endswith(".csv")][0]
-INPUT_FILE = [f for f in os.listdir(".") if f.endswith(".csv")]
-if len(INPUT_FILE) == 1:
-    INPUT_FILE = INPUT_FILE[0]
-elif len(INPUT_FILE) == 0:
-    INPUT_FILE = input("Enter the path of the CSV file: ").strip().strip('"').strip("'")
-else:
-    raise ValueError(f"Multiple input files found:\n{INPUT_FILE}")
+from availability_bitsets import add_to_counters, at_least, popcount, slot_student_masks
+from propose_discussion_sections import find_input_file, read_availability
+from section_optimizer import build_sections
 
+SORT_BY_AVAILABILITY_INSTEAD_OF_NAME = True
 
 # Lock in the facilitator times
-facilitator_times_and_group_names = {
+FACILITATOR_TIMES_AND_GROUP_NAMES = {
     ("Peter Gebauer 1", "Tu 4:30-5:50 PM", "Red"),
     ("Scott Viteri 1", "F 10:30-11:50 AM", "Blue"),
 }
-# Print the names of each section
-print("Facilitator times:")
-for facilitator, time, group_name in facilitator_times_and_group_names:
-    print(f"{group_name}: {time} ({' '.join(facilitator.split()[:-1])})")
-print()
-
-# Read in data
-students = []
-facilitators = []
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        name = row["Full Name"]
-        role = row["Are you a student or a facilitator?"]
-        availability = set(row["Availability"].split(","))
-        if role == "Student":
-            students.append((name, availability))
-        elif role == "Facilitator":
-            # Duplicate the facilitator for each number of groups they can facilitate
-            num_groups = int(row["Chosen num sections"])
-            for i in range(num_groups):
-                facilitators.append((f"{name} {i+1}", availability))
-        else:
-            raise ValueError(role)
-
-# Get each student and their available groups (facilitator and time)
-student_possible_groups = []
-for student_name, student_availability in students:
-    valid_groups = []
-    for facilitator, time, group_name in facilitator_times_and_group_names:
-        if time in student_availability:
-            valid_groups.append(group_name)
-    student_possible_groups.append((student_name, valid_groups))
-
-if SORT_BY_AVAILABILITY_INSTEAD_OF_NAME:
-    # Sort the students by the number of available groups, least to most
-    student_possible_groups.sort(key=lambda x: len(x[1]))
-else:
-    # Sort the students by name
-    student_possible_groups.sort(key=lambda x: x[0])
-
-# Print out the avaiabilities
-for student_name, student_availability in student_possible_groups:
-    print(f'{student_name}: {", ".join(student_availability)}')
+
+TOP_SETS = 5
+MAX_COMBINATIONS = 10_000_000
+
+
+def positive_int(value):
+    """argparse type for an integer of at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def student_possible_groups(students, facilitator_times_and_group_names, sort_by_availability=True):
+    """Each student and the names of the groups (facilitator and time) they can make."""
+    possible_groups = []
+    for student_name, student_availability in students:
+        valid_groups = []
+        for facilitator, time_slot, group_name in facilitator_times_and_group_names:
+            if time_slot in student_availability:
+                valid_groups.append(group_name)
+        possible_groups.append((student_name, valid_groups))
+
+    if sort_by_availability:
+        # Sort the students by the number of available groups, least to most
+        possible_groups.sort(key=lambda x: len(x[1]))
+    else:
+        # Sort the students by name
+        possible_groups.sort(key=lambda x: x[0])
+    return possible_groups
+
+
+def prune_sections(sections, max_combinations):
+    """
+    Greedily keep only each section's times that the most students can make, so
+    there are at most max_combinations combinations. Returns whether anything was pruned.
+    """
+    def num_combinations(beam):
+        return math.prod(min(len(section.slots), beam) for section in sections)
+
+    beam = max(len(section.slots) for section in sections)
+    if num_combinations(beam) <= max_combinations:
+        return False
+    while beam > 1 and num_combinations(beam) > max_combinations:
+        beam -= 1
+    for section in sections:
+        # Keep the chronological order, which a facilitator's sections all share
+        keep = sorted(sorted(range(len(section.slots)), key=lambda j: -popcount(section.masks[j]))[:beam])
+        section.slots = [section.slots[j] for j in keep]
+        section.masks = [section.masks[j] for j in keep]
+    return True
+
+
+def best_section_sets(sections, min_sections=1, top=TOP_SETS):
+    """
+    Score every combination of section times by how many students can make at least
+    min_sections of them, using bit-sliced counters over the student bitsets.
+
+    Returns ([(score, {section name: time}), ...] best first, combinations scored).
+    A facilitator's sections always get different times.
+    """
+    best = []  # Min-heap of (score, tiebreak, chosen option indices)
+    tiebreak = itertools.count()
+    chosen = []
+    num_scored = 0
+    last = len(sections) - 1
+
+    def search(i, counters):
+        nonlocal num_scored
+        section = sections[i]
+        # Symmetry breaking: a facilitator's sections take their times in increasing order
+        first = chosen[-1] + 1 if i > 0 and sections[i - 1].facilitator == section.facilitator else 0
+        if i < last:
+            for j in range(first, len(section.masks)):
+                chosen.append(j)
+                search(i + 1, add_to_counters(counters, section.masks[j]))
+                chosen.pop()
+            return
+
+        # Innermost loop: only the top counter is needed to score each option
+        below = counters[-2] if len(counters) > 1 else -1
+        top_counter = counters[-1]
+        threshold = best[0][0] if len(best) == top else -1
+        for j in range(first, len(section.masks)):
+            score = popcount(top_counter | (below & section.masks[j]))
+            if score > threshold:
+                entry = (score, next(tiebreak), chosen + [j])
+                if len(best) < top:
+                    heapq.heappush(best, entry)
+                else:
+                    heapq.heapreplace(best, entry)
+                threshold = best[0][0] if len(best) == top else -1
+        num_scored += max(len(section.masks) - first, 0)
+
+    if sections:
+        search(0, [0] * min_sections)
+
+    results = []
+    for score, _, indices in sorted(best, reverse=True):
+        results.append((score, {section.name: section.slots[j] for section, j in zip(sections, indices)}))
+    return results, num_scored
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Print which of the chosen sections each student can make.")
+    parser.add_argument("input_file", nargs="?", help="Availability CSV (default: the one CSV in this folder)")
+    parser.add_argument("--sort-by-name", action="store_true", default=not SORT_BY_AVAILABILITY_INSTEAD_OF_NAME,
+                        help="Sort students by name instead of by how many sections they can make")
+    parser.add_argument("--what-if", action="store_true",
+                        help="Also search every combination of the facilitators' times for the best sets")
+    parser.add_argument("--at-least", type=positive_int, default=1, help="Score sets by students who can make this many sections")
+    parser.add_argument("--top", type=positive_int, default=TOP_SETS, help="How many sets to report")
+    parser.add_argument("--max-combinations", type=int, default=MAX_COMBINATIONS,
+                        help="Prune each section's times to keep the search under this many combinations")
+    args = parser.parse_args()
+
+    input_file = find_input_file(args.input_file)
+
+    # Print the names of each section
+    print("Facilitator times:")
+    for facilitator, time_slot, group_name in FACILITATOR_TIMES_AND_GROUP_NAMES:
+        print(f"{group_name}: {time_slot} ({' '.join(facilitator.split()[:-1])})")
+    print()
+
+    # Read in data
+    students, facilitators = read_availability(input_file)
+
+    # Print out the avaiabilities
+    for student_name, student_availability in student_possible_groups(
+        students, FACILITATOR_TIMES_AND_GROUP_NAMES, sort_by_availability=not args.sort_by_name
+    ):
+        print(f'{student_name}: {", ".join(student_availability)}')
+
+    if not args.what_if:
+        return
+
+    slot_masks = slot_student_masks(students)
+    chosen_masks = [slot_masks.get(time_slot, 0) for _, time_slot, _ in FACILITATOR_TIMES_AND_GROUP_NAMES]
+    chosen_score = popcount(at_least(chosen_masks, args.at_least))
+
+    # Only times at least one student can make are worth considering
+    sections = [section for section in build_sections(facilitators, slot_masks, min_group_size=1) if section.slots]
+    pruned = prune_sections(sections, args.max_combinations)
+    started = time.perf_counter()
+    results, num_scored = best_section_sets(sections, args.at_least, args.top)
+    elapsed = time.perf_counter() - started
+
+    print()
+    print(f"### What-if: students who can make at least {args.at_least} section(s) ###")
+    print(f"Chosen set: {chosen_score}/{len(students)}")
+    print(
+        f"Scored {num_scored:,} combinations in {elapsed:.2f}s ({num_scored / max(elapsed, 1e-9):,.0f}/s)"
+        + (", keeping only each section's most popular times" if pruned else "")
+    )
+    for rank, (score, schedule) in enumerate(results, start=1):
+        print(f"\n## Set {rank}: {score}/{len(students)} students")
+        for name, _ in facilitators:
+            print(f"- {name}: {schedule.get(name, 'no time any student can make')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,40 @@
-import csv
-
-# File selection
-INPUT_FILE = input('Enter the path of a CSV file...\n')
-
-# Open the CSV file
-with open(INPUT_FILE, 'r') as file:
-    # Read the CSV data into a list of dictionaries
-    reader = csv.DictReader(file)
-    input_data = list(reader)
-
-# Calculate the stuff for each student
-for input_row in input_data:
-    for possible_name_key in ['Name', 'name', 'Full Name', 'full name', 'fullname', 'FullName']:
-        try:
-            full_name = input_row[possible_name_key]
-            if full_name != '':
-                input_row['first_name'] = full_name.split(' ')[0].strip()
-        except KeyError:
-            continue
-
-
-# Write output
-with open(INPUT_FILE, 'w', newline='\n') as file:
-    # Write the CSV data
-    writer = csv.DictWriter(file, fieldnames=input_data[0].keys())
-    writer.writeheader()
-    writer.writerows(input_data)
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from script_utils.csv_stream import read_fieldnames, resolve_columns, transform_csv_in_place  # noqa: E402
+
+NAME_KEYS = ['Name', 'name', 'Full Name', 'full name', 'fullname', 'FullName']
+
+
+# Calculate the stuff for each student, from whichever name columns are filled in for that row
+def add_first_name(input_row, name_keys):
+    for name_key in name_keys:
+        full_name = input_row[name_key]
+        if full_name != '':
+            input_row['first_name'] = full_name.split(' ')[0].strip()
+    return input_row
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Add a first_name column to a CSV from its name column, in place.')
+    parser.add_argument('input_file', nargs='?', help='CSV file to update (prompted for if omitted)')
+    args = parser.parse_args()
+
+    # File selection
+    input_file = args.input_file or input('Enter the path of a CSV file...\n')
+
+    # Find which name columns exist once from the header
+    name_keys = resolve_columns(read_fieldnames(input_file), NAME_KEYS)
+    if not name_keys:
+        print(f'No name column found in {input_file}, leaving it unchanged')
+        return
+
+    # Stream the rows into a temp file that replaces the original when done
+    transform_csv_in_place(input_file, lambda row: add_first_name(row, name_keys), extra_fieldnames=['first_name'])
+
+
+if __name__ == '__main__':
+    main()
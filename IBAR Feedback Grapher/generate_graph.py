@@ -1,109 +1,172 @@
 """Load the final feedback form data, find every column with numeric data, and plot bar plots showing the distribution of each column's data along with the question that column was asking all together on one big plot."""
 
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from script_utils.rendering import add_render_arguments, output_path, render_figures  # noqa: E402
+
+RATING_SCALES = [5, 10]
+
+
+def compute_rating_stats(df, max_ratings):
+    """
+    Compute the stats for every rating column at once.
+
+    Returns a tidy table with one row per rating column: its question, max_rating,
+    n, mean, std, q1, median, q3, and count_1 ... count_{max_rating} (nullable
+    integers, <NA> above that column's max rating).
+    """
+    import numpy as np
+    import pandas as pd
+
+    # Find all ratings columns (whole-number answers) and their scales in one pass
+    ratings = df.select_dtypes(include=['int64'])
+    column_maxes = ratings.max()
+
+    tables = []
+    for max_rating in max_ratings:
+        columns = [column for column in ratings.columns if column_maxes[column] == max_rating]
+        if not columns:
+            continue
+        values = ratings[columns].to_numpy()
+
+        # Mean, std and quartiles for all the columns together
+        described = ratings[columns].describe().T
+        table = pd.DataFrame({
+            'question': columns,
+            'max_rating': max_rating,
+            'n': len(values),
+            'mean': described['mean'].to_numpy(),
+            'std': described['std'].to_numpy(),
+            'q1': described['25%'].to_numpy(),
+            'median': described['50%'].to_numpy(),
+            'q3': described['75%'].to_numpy(),
+        })
+
+        # Histogram every column with one bincount by offsetting each column's values.
+        # Negative answers go in an extra bin that isn't plotted, like the ratings
+        # outside 1 to max_rating always were
+        num_bins = max_rating + 2
+        values = np.where(values >= 0, values, max_rating + 1)
+        offsets = np.arange(len(columns)) * num_bins
+        counts = np.bincount((values + offsets).ravel(), minlength=num_bins * len(columns))
+        counts = counts.reshape(len(columns), num_bins)
+        for rating in range(1, max_rating + 1):
+            table[f'count_{rating}'] = counts[:, rating]
+        tables.append(table)
+
+    if not tables:
+        return pd.DataFrame(columns=['question', 'max_rating', 'n', 'mean', 'std', 'q1', 'median', 'q3'])
+    stats = pd.concat(tables, ignore_index=True)
+    # Keep the counts integers (so labels read "3 / 40") where scales with fewer ratings pad them
+    count_columns = [column for column in stats.columns if column.startswith('count_')]
+    return stats.astype({column: 'Int64' for column in count_columns})
+
+
+def plot_rating_stats(stats, max_rating, path, dpi):
+    """Stack a bar plot of each question's rating distribution on one big figure."""
+    import matplotlib.pyplot as plt
 
-# Read the CSV data
-
-INPUT_FILE = input('Enter the path of a CSV file...\n')
-# INPUT_FILE = "C:/Users/Gabe/Downloads/Final Feedback Form-Everyone.csv"
-
-# Format filename to avoid invalid arguments (e.g. \\ on Windows, remove quotes)
-
-INPUT_FILE = INPUT_FILE.replace('\\', '/').replace('"', '').replace("'", '')
-
-df = pd.read_csv(INPUT_FILE)
-
-# Remove the "Last 4 digits of your phone number" column
-df = df.drop(columns=['Last 4 digits of your phone number'])
-
-# Find all ratings columns
-ratings_columns = df.select_dtypes(include=['int64']).columns
-
-# Make separate graphs for the 0-5 and the 0-10 metrics
-for max_rating in [5, 10]:
-    # Filter out the columns that don't have a max rating of max_rating
-    ratings_columns = df.select_dtypes(include=['int64']).columns
-    ratings_columns = [column for column in ratings_columns if df[column].max() == max_rating]
-
-    # Number of total columns
-    num_columns = len(ratings_columns)
+    # Set a good font
+    plt.rcParams['font.family'] = 'sans-serif'
+    plt.rcParams['font.sans-serif'] = [
+        'Bahnschrift', 'Arial',
+        'Calibri', 'DejaVu Sans', 'Liberation Sans', 'Tahoma', 'Verdana']
 
-    # Clear the plot
-    plt.clf()
+    num_columns = len(stats)
+    bins = list(range(1, max_rating + 1))
 
     # Create a new figure to stack all the plots on top of each other with a shared x-axis
-    fig, axes = plt.subplots(num_columns, 1, figsize=(10, 1.2 * num_columns))
-
-    # Plot each of the histograms by calculating them manually
-    bins = range(1, max_rating + 1)
-    means = []
-    stdevs = []
-    quartile_1s = []
-    medians = []
-    quartile_3s = []
-    for i, column in enumerate(ratings_columns):
+    fig, axes = plt.subplots(num_columns, 1, figsize=(10, 1.2 * num_columns), squeeze=False)
+    axes = axes[:, 0]
+
+    # Plot each of the histograms from the precomputed counts
+    for i, row in enumerate(stats.itertuples(index=False)):
         # Different hue for each column
         color = f'C{i}'
-        counts = df[column].value_counts().sort_index()
-        counts = counts.reindex(bins, fill_value=0)
-        axes[i].bar(bins, counts, width=0.9, align='center', label=column, color=color)
-        axes[i].set_title(df[column].name, fontsize=12, y=0.7)
+        counts = [getattr(row, f'count_{rating}') for rating in bins]
+        axes[i].bar(bins, counts, width=0.9, align='center', label=row.question, color=color)
+        axes[i].set_title(row.question, fontsize=12, y=0.7)
         axes[i].set_xticks(bins)
 
         # Add labels
+        max_count = max(counts)
         for x, y in zip(bins, counts):
             if y == 0:
                 continue
             if y < 3:
                 align = 'bottom'
-                y_position = y + 0.025 * max(counts)
+                y_position = y + 0.025 * max_count
             else:
                 align = 'top'
-                y_position = y - 0.025 * max(counts)
-            label = f'{y} / {len(df[column])} = {y / len(df[column]):.1%}'
+                y_position = y - 0.025 * max_count
+            label = f'{y} / {row.n} = {y / row.n:.1%}'
             axes[i].text(x, y_position, label, ha='center', va=align, fontsize=8)
 
-        # Calculate statistics
-        mean = df[column].mean()
-        stdev = df[column].std()
-        quartile_1 = df[column].quantile(0.25)
-        median = df[column].median()
-        quartile_3 = df[column].quantile(0.75)
-        means.append(mean)
-        stdevs.append(stdev)
-        quartile_1s.append(quartile_1)
-        medians.append(median)
-        quartile_3s.append(quartile_3)
-
     # Remove vertical space between each plot
     plt.subplots_adjust(hspace=-4)
 
-    # Add a bit of bottom margin for the bottom labels
-
     # Add a supertitle
     fig.suptitle(f'IBAR 2023 Feedback (1-{max_rating} Questions)', fontsize=16)
 
     # Set tight bounds
     plt.tight_layout()
 
-    # Set a good font
-    plt.rcParams['font.family'] = 'sans-serif'
-    plt.rcParams['font.sans-serif'] = [
-        'Bahnschrift', 'Arial',
-        'Calibri', 'DejaVu Sans', 'Liberation Sans', 'Tahoma', 'Verdana']
-
-    # Set the x-axis to go from 0 to 10
-    # plt.xlim(0, 10)
-
     # Format the plot so it all shows up
-    plt.savefig(f'feedback_0-{max_rating}.png', dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
 
-    # Print info about the statistics
+
+def print_rating_stats(stats, max_rating):
+    """Print info about the statistics as Markdown."""
     print(f'0-{max_rating} statistics:')
-    for i, column in enumerate(ratings_columns):
-        print(f'- _{column}_')
-        print(f'  - Mean (±Stdev): **{means[i]:.2f}** (±{stdevs[i]:.2f})')
-        print(f'  - Quartiles: {quartile_1s[i]:.2f}, **{medians[i]:.2f}**, {quartile_3s[i]:.2f}')
+    for row in stats.itertuples(index=False):
+        print(f'- _{row.question}_')
+        print(f'  - Mean (±Stdev): **{row.mean:.2f}** (±{row.std:.2f})')
+        print(f'  - Quartiles: {row.q1:.2f}, **{row.median:.2f}**, {row.q3:.2f}')
 
     print('\n\n####################\n\n')
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Plot the distribution of every rating question in a feedback CSV.')
+    parser.add_argument('input_file', nargs='?', help='Feedback form CSV (prompted for if omitted)')
+    add_render_arguments(parser)
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    # Read the CSV data
+    input_file = args.input_file or input('Enter the path of a CSV file...\n')
+    # input_file = "C:/Users/Gabe/Downloads/Final Feedback Form-Everyone.csv"
+
+    # Format filename to avoid invalid arguments (e.g. \\ on Windows, remove quotes)
+    input_file = input_file.replace('\\', '/').replace('"', '').replace("'", '')
+
+    df = pd.read_csv(input_file)
+
+    # Remove the "Last 4 digits of your phone number" column
+    df = df.drop(columns=['Last 4 digits of your phone number'])
+
+    all_stats = compute_rating_stats(df, RATING_SCALES)
+
+    # Make separate graphs for the 0-5 and the 0-10 metrics, rendered in parallel
+    scales = [
+        (max_rating, all_stats[all_stats['max_rating'] == max_rating])
+        for max_rating in RATING_SCALES
+    ]
+    scales = [(max_rating, stats) for max_rating, stats in scales if not stats.empty]
+    render_figures([
+        (plot_rating_stats, (stats, max_rating, output_path(f'feedback_0-{max_rating}', args.format), args.dpi))
+        for max_rating, stats in scales
+    ], args.render_workers)
+
+    for max_rating, stats in scales:
+        print_rating_stats(stats, max_rating)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,91 +1,191 @@
 """This code will generate a text file named `table.txt` containing the table and an image named `heatmap.png` containing the heatmap. You can then copy the table from the text file and paste it into Google Docs, and insert the image into Google Docs as well."""
 
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-
-# Read the CSV data
-INPUT_FILE = input('Enter the path of a CSV file...\n')
-# INPUT_FILE = "C:/Users/Gabe/Documents/GitHub/Personal/Public-Scripts/IBAR Marginal Worth It Table Producer/SAIA Retreats (Attendees)-Worth it for Attendees .csv"
-# Format filename to avoid invalid arguments (e.g. \\ on Windows, remove quotes)
-INPUT_FILE = INPUT_FILE.replace('\\', '/').replace('"', '').replace("'", '')
-
-df = pd.read_csv(INPUT_FILE)
-
-# Rename "How good to have invited them? (How much did they improve the retreat/how valuable was it)" to "How good to have invited them?"
-df = df.rename(columns={
-               'How good to have invited them? (How much did they improve the retreat/how valuable was it)': 'How good to have invited them?'})
-
-# Rename the 'Berkeley Student' and 'Stanford student' values to 'Berkeley' and 'Stanford'
-df['School'] = df['School'].replace({'Berkeley student': 'Berkeley', 'Stanford student': 'Stanford'})
-
-# Calculate the counts and percentages
-pivot_table = pd.crosstab(
-    df['School'], df['How good to have invited them?'], margins=True)
-
-# Swap the "Stanford" and "Other" rows
-pivot_table = pivot_table.reindex(['Stanford', 'Berkeley', 'Other', 'All'])
-
-# Change the x-axis to go in the order [Fairly negative/made things worse, Shouldn't have invited, Unknown/neutral, Slightly beneficial, Very beneficial]
-pivot_table = pivot_table[['Shouldn\'t have invited',
-                           'Unknown/neutral', 'Slightly beneficial', 'Very beneficial', 'All']]
-
-# Swap the "Stanford student" and "Other" columns
-pivot_table_percent = pivot_table.div(pivot_table.iloc[:, -1], axis=0) * 100
-
-### Formatting ###
-
-plt.figure(figsize=(12, 6))
-sns.set(font_scale=1.2)
-
-# Set a good font
-plt.rcParams['font.family'] = 'sans-serif'
-plt.rcParams['font.sans-serif'] = ['Bahnschrift', 'Arial',
-                                   'Calibri', 'DejaVu Sans', 'Liberation Sans', 'Tahoma', 'Verdana']
-
-### Counts ###
-
-# Save the table as a text file
-with open('table_counts.txt', 'w') as f:
-    f.write(pivot_table.to_string())
-
-# Create a heatmap using seaborn
-# Get the second highest value in the table (so not the All/All) to be the vmax
-values = pivot_table.values
-vmax = values[values != values.max()].max()
-heatmap = sns.heatmap(pivot_table, annot=True, cmap='viridis', vmax=vmax, fmt="d", cbar=False)
-heatmap.set_xticklabels(heatmap.get_xticklabels(), rotation=0)
-
-# Label the heatmap
-plt.xlabel('How good to have invited them? (How much did they improve the retreat/how valuable was it)')
-plt.ylabel('School')
-plt.title('IBAR Attendee Worth It (Counts)', fontweight='bold', fontsize=16)
-
-# Save the heatmap as an image
-plt.savefig('heatmap_counts.png', dpi=300, bbox_inches='tight')
-
-# Clear the plot
-plt.clf()
-
-### Percentages ###
-
-# Remove the "All" column because it's all 100%
-pivot_table_percent = pivot_table_percent.drop('All', axis=1)
-
-# Save the table as a text file
-with open('table_percentages.txt', 'w') as f:
-    f.write(pivot_table_percent.to_string())
-
-# Create a heatmap using seaborn (label with % sign)
-heatmap = sns.heatmap(pivot_table_percent, annot=True, cmap='viridis', fmt=".1f", cbar=False)
-# Add percentage signs
-for t in heatmap.texts:
-    t.set_text(t.get_text() + '%')
-
-# Label the heatmap
-plt.xlabel('How good to have invited them? (How much did they improve the retreat/how valuable was it)')
-plt.ylabel('School')
-plt.title('IBAR Attendee Worth It (Percentages by Row)', fontweight='bold', fontsize=16)
-
-# Save the heatmap as an image
-plt.savefig('heatmap_percentages.png', dpi=300, bbox_inches='tight')
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from script_utils.rendering import add_render_arguments, output_path, render_figures  # noqa: E402
+
+RATING_LABEL = 'How good to have invited them? (How much did they improve the retreat/how valuable was it)'
+
+# Display order of the table rows and columns
+SCHOOLS = ['Stanford', 'Berkeley', 'Other']
+# The x-axis goes in the order [Fairly negative/made things worse, Shouldn't have invited, Unknown/neutral, Slightly beneficial, Very beneficial]
+RATINGS = ['Shouldn\'t have invited', 'Unknown/neutral', 'Slightly beneficial', 'Very beneficial']
+
+
+def render_heatmap(table, title, path, dpi, percentages=False, ylabel='School'):
+    """Render one table as an annotated heatmap image."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    ### Formatting ###
+
+    plt.figure(figsize=(12, 6))
+    sns.set(font_scale=1.2)
+
+    # Set a good font
+    plt.rcParams['font.family'] = 'sans-serif'
+    plt.rcParams['font.sans-serif'] = ['Bahnschrift', 'Arial',
+                                       'Calibri', 'DejaVu Sans', 'Liberation Sans', 'Tahoma', 'Verdana']
+
+    if percentages:
+        # Create a heatmap using seaborn (label with % sign)
+        heatmap = sns.heatmap(table, annot=True, cmap='viridis', fmt=".1f", cbar=False)
+        # Add percentage signs
+        for t in heatmap.texts:
+            t.set_text(t.get_text() + '%')
+    else:
+        # Get the second highest value in the table (so not the All/All) to be the vmax
+        values = table.values
+        vmax = values[values != values.max()].max()
+        heatmap = sns.heatmap(table, annot=True, cmap='viridis', vmax=vmax, fmt="d", cbar=False)
+        heatmap.set_xticklabels(heatmap.get_xticklabels(), rotation=0)
+
+    # Label the heatmap
+    plt.xlabel(RATING_LABEL)
+    plt.ylabel(ylabel)
+    plt.title(title, fontweight='bold', fontsize=16)
+
+    # Save the heatmap as an image
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+def load_retreats(paths):
+    """
+    Load one or more attendee CSVs into one categorical-typed frame of (Event, School, Rating).
+
+    Each file is one event, named after the file. School and rating categories are
+    listed in display order, followed by any unexpected values so they still count
+    towards the "All" totals.
+    """
+    import pandas as pd
+
+    frames = []
+    for path in paths:
+        df = pd.read_csv(path, usecols=['School', RATING_LABEL])
+        # Rename the 'Berkeley Student' and 'Stanford student' values to 'Berkeley' and 'Stanford'
+        df['School'] = df['School'].replace({'Berkeley student': 'Berkeley', 'Stanford student': 'Stanford'})
+        frames.append(pd.DataFrame({
+            'Event': os.path.splitext(os.path.basename(path))[0],
+            'School': df['School'],
+            'Rating': df[RATING_LABEL],
+        }))
+    df = pd.concat(frames, ignore_index=True)
+
+    events = list(dict.fromkeys(df['Event']))
+    schools = SCHOOLS + sorted(set(df['School'].dropna()) - set(SCHOOLS))
+    ratings = RATINGS + sorted(set(df['Rating'].dropna()) - set(RATINGS))
+    df['Event'] = pd.Categorical(df['Event'], categories=events)
+    df['School'] = pd.Categorical(df['School'], categories=schools)
+    df['Rating'] = pd.Categorical(df['Rating'], categories=ratings)
+    return df
+
+
+def count_cube(df):
+    """Event x School x Rating counts from a single groupby, as (counts array, events, schools, ratings)."""
+    events = list(df['Event'].cat.categories)
+    schools = list(df['School'].cat.categories)
+    ratings = list(df['Rating'].cat.categories)
+    counts = df.groupby(['Event', 'School', 'Rating'], observed=False).size()
+    return counts.to_numpy().reshape(len(events), len(schools), len(ratings)), events, schools, ratings
+
+
+def pivot_tables(counts, schools, ratings):
+    """
+    The counts and row-percentage tables for one School x Rating slice of the cube.
+
+    Same layout as pd.crosstab(..., margins=True): "All" totals include every school
+    and rating, but only the SCHOOLS and RATINGS are shown, in that order.
+    """
+    import pandas as pd
+
+    pivot_table = pd.DataFrame(counts, index=schools, columns=ratings)
+    pivot_table['All'] = pivot_table.sum(axis=1)
+    pivot_table.loc['All'] = pivot_table.sum(axis=0)
+
+    # Stanford, Berkeley, Other, All rows and the ratings from worst to best
+    pivot_table = pivot_table.loc[SCHOOLS + ['All'], RATINGS + ['All']]
+    pivot_table.index.name = 'School'
+    pivot_table.columns.name = 'How good to have invited them?'
+
+    pivot_table_percent = pivot_table.div(pivot_table.iloc[:, -1], axis=0) * 100
+
+    # Remove the "All" column because it's all 100%
+    pivot_table_percent = pivot_table_percent.drop('All', axis=1)
+    return pivot_table, pivot_table_percent
+
+
+def write_tables(pivot_table, pivot_table_percent, suffix, args):
+    """Save both tables as text files and return render jobs for their heatmaps."""
+    with open(os.path.join(args.output_dir, f'table_counts{suffix}.txt'), 'w') as f:
+        f.write(pivot_table.to_string())
+    with open(os.path.join(args.output_dir, f'table_percentages{suffix}.txt'), 'w') as f:
+        f.write(pivot_table_percent.to_string())
+
+    title_suffix = f' - {suffix.lstrip("_")}' if suffix else ''
+    return [
+        (render_heatmap, (pivot_table, f'IBAR Attendee Worth It (Counts){title_suffix}',
+                          output_path(os.path.join(args.output_dir, f'heatmap_counts{suffix}'), args.format),
+                          args.dpi)),
+        (render_heatmap, (pivot_table_percent, f'IBAR Attendee Worth It (Percentages by Row){title_suffix}',
+                          output_path(os.path.join(args.output_dir, f'heatmap_percentages{suffix}'), args.format),
+                          args.dpi, True)),
+    ]
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Tabulate and heatmap how worth it each retreat attendee was.')
+    parser.add_argument('input_file', nargs='?', help='Attendee CSV export (prompted for if omitted)')
+    parser.add_argument('--input-dir', help='Folder of attendee CSVs, one per retreat, to compare across')
+    parser.add_argument('--output-dir', default='.', help='Where to write the tables and heatmaps')
+    add_render_arguments(parser)
+    args = parser.parse_args()
+
+    if args.input_dir:
+        paths = sorted(
+            os.path.join(args.input_dir, filename)
+            for filename in os.listdir(args.input_dir)
+            if filename.lower().endswith('.csv')
+        )
+    else:
+        # Read the CSV data
+        input_file = args.input_file or input('Enter the path of a CSV file...\n')
+        # input_file = "C:/Users/Gabe/Documents/GitHub/Personal/Public-Scripts/IBAR Marginal Worth It Table Producer/SAIA Retreats (Attendees)-Worth it for Attendees .csv"
+        # Format filename to avoid invalid arguments (e.g. \\ on Windows, remove quotes)
+        paths = [input_file.replace('\\', '/').replace('"', '').replace("'", '')]
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    import pandas as pd
+
+    # Count everything once, then slice every table out of the cube
+    cube, events, schools, ratings = count_cube(load_retreats(paths))
+
+    # All events together (just the one file, without a suffix, in single-file mode)
+    jobs = write_tables(*pivot_tables(cube.sum(axis=0), schools, ratings), '', args)
+
+    if args.input_dir:
+        # Each event on its own
+        for i, event in enumerate(events):
+            jobs += write_tables(*pivot_tables(cube[i], schools, ratings), f'_{event}', args)
+
+        # Rating distribution of each event, to compare retreats
+        event_table = pd.DataFrame(cube.sum(axis=1), index=events, columns=ratings)
+        event_percent = (event_table.div(event_table.sum(axis=1), axis=0) * 100)[RATINGS]
+        event_percent.index.name = 'Event'
+        with open(os.path.join(args.output_dir, 'table_percentages_by_event.txt'), 'w') as f:
+            f.write(event_percent.to_string())
+        jobs.append((render_heatmap, (event_percent, 'IBAR Attendee Worth It (Percentages by Event)',
+                                      output_path(os.path.join(args.output_dir, 'heatmap_percentages_by_event'),
+                                                  args.format),
+                                      args.dpi, True, 'Event')))
+
+    # Render all the heatmaps in parallel
+    render_figures(jobs, args.render_workers)
+
+
+if __name__ == '__main__':
+    main()
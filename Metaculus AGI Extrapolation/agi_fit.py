@@ -0,0 +1,127 @@
+"""
+Numeric core for the Metaculus AGI extrapolation.
+
+Fits the prediction history with closed-form least squares and solves for where
+the fitted line crosses y = x (the predicted year equals the year the prediction
+was made) analytically, instead of reading values back off a seaborn plot.
+"""
+
+import datetime
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import prediction_store
+
+# Two-sided 95% normal quantile for confidence bands
+Z_95 = 1.959963984540054
+
+
+def load_predictions(path=None):
+    """
+    Load (decimal year of prediction, predicted AGI year) float arrays.
+
+    Reads the Parquet prediction store when path is a directory (the default, if the
+    store has been created with prediction_store.py), otherwise a JSON list like predictions.json.
+    """
+    if path is None:
+        path = prediction_store.STORE_DIR if prediction_store.exists() else './predictions.json'
+    if os.path.isdir(path):
+        table = prediction_store.load(store_dir=path)
+        return table['decimal_year'].to_numpy(), table['agi_prediction'].to_numpy()
+
+    import pandas as pd
+
+    df = pd.read_json(path)
+    # Convert string times to datetime and normalize timezone
+    dates = pd.to_datetime(df['date_of_prediction']).dt.tz_localize(None)
+    # The year as a decimal (row.time.year + row.time.dayofyear / 365)
+    x = (dates.dt.year + dates.dt.dayofyear / 365).to_numpy(dtype=np.float64)
+    y = df['agi_prediction'].to_numpy(dtype=np.float64)
+    return x, y
+
+
+def fit_line(x, y):
+    """Ordinary least squares fit of y = slope * x + intercept. Returns (slope, intercept)."""
+    x_mean = x.mean()
+    y_mean = y.mean()
+    dx = x - x_mean
+    slope = np.dot(dx, y - y_mean) / np.dot(dx, dx)
+    return slope, y_mean - slope * x_mean
+
+
+def crossing_year(slope, intercept):
+    """Year where slope * x + intercept = x, or None if the line is parallel to y = x."""
+    if slope == 1:
+        return None
+    return intercept / (1 - slope)
+
+
+def confidence_band(x, y, slope, intercept, xs, z=Z_95):
+    """Lower and upper confidence band of the fitted mean at xs (what seaborn bootstraps for)."""
+    n = len(x)
+    residuals = y - (slope * x + intercept)
+    sigma = np.sqrt(np.dot(residuals, residuals) / (n - 2))
+    dx = x - x.mean()
+    standard_error = sigma * np.sqrt(1 / n + (xs - x.mean()) ** 2 / np.dot(dx, dx))
+    fitted = slope * xs + intercept
+    return fitted - z * standard_error, fitted + z * standard_error
+
+
+def _bootstrap_chunk(x, y, num_resamples, seed_sequence):
+    """AGI crossings for num_resamples bootstrap resamples, all fit at once."""
+    rng = np.random.default_rng(seed_sequence)
+    # One (resamples x points) matrix of indices, no Python loop over resamples
+    indices = rng.integers(0, len(x), size=(num_resamples, len(x)))
+    xs = x[indices]
+    ys = y[indices]
+
+    # Batched closed-form least squares, one row per resample
+    x_means = xs.mean(axis=1, keepdims=True)
+    y_means = ys.mean(axis=1, keepdims=True)
+    dx = xs - x_means
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = np.einsum('ij,ij->i', dx, ys - y_means) / np.einsum('ij,ij->i', dx, dx)
+        intercepts = y_means[:, 0] - slopes * x_means[:, 0]
+        return intercepts / (1 - slopes)
+
+
+def bootstrap_crossings(x, y, num_resamples, seed=None, workers=None, chunk_size=None):
+    """
+    Bootstrap the y = x crossing year by resampling predictions with replacement.
+
+    Resamples are split into chunks fit in parallel across processes (all cores by
+    default), each chunk drawing its resample indices as a single matrix. Chunks get
+    independent child seeds, so results are reproducible for a given seed and chunk size.
+    Returns an array of crossing years (NaN for degenerate resamples).
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # Keep each chunk's index matrix to roughly 64 MB
+        chunk_size = max(1, min(-(-num_resamples // workers), 8_000_000 // max(1, len(x))))
+    chunk_sizes = [min(chunk_size, num_resamples - start) for start in range(0, num_resamples, chunk_size)]
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    if workers == 1 or len(chunk_sizes) == 1:
+        chunks = [_bootstrap_chunk(x, y, size, seq) for size, seq in zip(chunk_sizes, seed_sequences)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(
+                _bootstrap_chunk,
+                [x] * len(chunk_sizes), [y] * len(chunk_sizes), chunk_sizes, seed_sequences,
+            ))
+    return np.concatenate(chunks) if chunks else np.array([])
+
+
+def percentile_interval(samples, confidence=0.95):
+    """(lower, median, upper) percentile interval of the finite samples."""
+    samples = samples[np.isfinite(samples)]
+    tail = (1 - confidence) / 2 * 100
+    return tuple(np.percentile(samples, [tail, 50, 100 - tail]))
+
+
+def decimal_year_to_date(year):
+    """Convert a decimal year to a date (e.g. 2020.5 -> 2020 June 1)."""
+    days = 365 * (year - int(year))
+    return datetime.datetime(int(year), 1, 1) + datetime.timedelta(days=days)
@@ -7,118 +7,110 @@ https://www.metaculus.com/questions/5121/date-of-artificial-general-intelligence
 Code originally by Rylan Schaeffer.
 """
 
-import matplotlib.pyplot as plt
-import pandas as pd
-import seaborn as sns
-import datetime
-
-df = pd.read_json('./predictions.json')
-# Convert string times to datetime
-df['date_of_prediction'] = pd.to_datetime(df['date_of_prediction'])
-# Normalize timezone
-df['date_of_prediction'] = df['date_of_prediction'].dt.tz_localize(None)
-# Create a new column with the year as a decimal (row.time.year + row.time.dayofyear / 365)
-df['date_of_prediction'] = df['date_of_prediction'].dt.year + df['date_of_prediction'].dt.dayofyear / 365
-
-left_bound = 2020.6
-right_bound = 2027
-
-plt.xlim(left=left_bound, right=right_bound)
-g = sns.regplot(
-    data=df,
-    x='date_of_prediction',
-    y='agi_prediction',
-    truncate=False,
-    color='royalblue',
-)
-
-# Now, let's just try a regression using the data after 2022 (when the slope suddenly changes)
-split_point = 2022
-df2 = df[df['date_of_prediction'] > split_point]
-g2 = sns.regplot(
-    data=df2,
-    x='date_of_prediction',
-    y='agi_prediction',
-    truncate=False,
-    color='green',
-)
-
-# Calculate the slope of the regressions
-regression_line1 = g.get_lines()[0]
-slope1 = (regression_line1.get_ydata()[99] - regression_line1.get_ydata()[0]) / \
-    (regression_line1.get_xdata()[99] - regression_line1.get_xdata()[0])
-
-regression_line2 = g2.get_lines()[1]
-slope2 = (regression_line2.get_ydata()[99] - regression_line2.get_ydata()[0]) / \
-    (regression_line2.get_xdata()[99] - regression_line2.get_xdata()[0])
-print(slope1)
-print(slope2)
-
-
-# Add a y=x graph (dashed)
-plt.plot([left_bound, right_bound], [left_bound, right_bound], color='crimson', linestyle='--')
-
-# Find the point where the x-value is the same as the y-value (actually the closest)
-closest_point = (0, 0)
-closest_distance = 1e9
-for x, y in zip(regression_line1.get_xdata(), regression_line1.get_ydata()):
-    distance = abs(x - y)
-    if distance < closest_distance:
-        closest_point = (x, y)
-        closest_distance = distance
-plt.plot(closest_point[0], closest_point[1], 'ro', markersize=10)
-
-# Convert the point to a date (e.g. 2020.5 -> 2020 June 1)
-days = 365 * (closest_point[0] - int(closest_point[0]))
-closest_point_date = datetime.datetime(int(closest_point[0]), 1, 1) + datetime.timedelta(days=days)
-
-# Add a label to the intersection point
-plt.text(closest_point[0], closest_point[1]+2,
-         f'AGI: {closest_point[0]:.2f}\n({closest_point_date.strftime("%Y %b %d")})')
-
-
-# Do the above for the second line
-closest_point2 = (0, 0)
-closest_distance2 = 1e9
-for x, y in zip(regression_line2.get_xdata(), regression_line2.get_ydata()):
-    distance = abs(x - y)
-    if distance < closest_distance2:
-        closest_point2 = (x, y)
-        closest_distance2 = distance
-plt.plot(closest_point2[0], closest_point2[1], 'ro', markersize=10)
-
-# Convert the point to a date (e.g. 2020.5 -> 2020 June 1)
-days = 365 * (closest_point2[0] - int(closest_point2[0]))
-closest_point_date2 = datetime.datetime(int(closest_point2[0]), 1, 1) + datetime.timedelta(days=days)
-
-# Add a label to the intersection point
-plt.text(closest_point2[0], closest_point2[1]+2,
-         f'AGI: {closest_point2[0]:.2f}\n({closest_point_date2.strftime("%Y %b %d")})')
-
-
-# Add a legend
-plt.legend([
-    'Metaculus Predictions Full',
-    f'Regression Full (m = {slope1:.2})',
-    'Error Full',
-    'Metaculus Predictions Post-2022',
-    f'Regression Post-2022 (m = {slope2:.2f})',
-    'Error Post-2022',
-    'y=x (Predicted Year = Actual Year)',
-    'AGI extrapolations (when the\nMetaculus prediction = the actual\nyear at the observed update rate))',
-])
-
-plt.ylim(bottom=2020, top=2065)
-g.tick_params('x', rotation=30)
-plt.xlabel('Prediction Dates')
-plt.ylabel('Predicted Date of AGI')
-plt.title('Metaculus Date of Strong AGI Extrapolation (Linear)')
-
-# Format the graph big and pretty
-plt.gcf().set_size_inches(8, 6)
-plt.tight_layout()
-
-plt.savefig('metaculus_strong_agi_extrapolation_linear.png')
-# plt.show()
-
-print('Finished!')
+import argparse
+
+import numpy as np
+
+from agi_fit import (bootstrap_crossings, confidence_band, crossing_year, decimal_year_to_date, fit_line,
+                     load_predictions, percentile_interval)
+
+LEFT_BOUND = 2020.6
+RIGHT_BOUND = 2027
+
+# When the slope suddenly changes
+SPLIT_POINT = 2022
+
+
+def plot(x, y, fits, crossings, intervals, split_point, output_path):
+    """Plot both regressions, the y=x line, and the AGI crossing points."""
+    import matplotlib.pyplot as plt
+
+    xs = np.linspace(LEFT_BOUND, RIGHT_BOUND, 100)
+    after_split = x > split_point
+
+    plt.xlim(left=LEFT_BOUND, right=RIGHT_BOUND)
+    for mask, (slope, intercept), color, name in [
+        (np.ones_like(after_split), fits[0], 'royalblue', 'Full'),
+        (after_split, fits[1], 'green', f'Post-{split_point:g}'),
+    ]:
+        plt.scatter(x[mask], y[mask], color=color, alpha=0.8, s=16, label=f'Metaculus Predictions {name}')
+        plt.plot(xs, slope * xs + intercept, color=color, label=f'Regression {name} (m = {slope:.2f})')
+        lower, upper = confidence_band(x[mask], y[mask], slope, intercept, xs)
+        plt.fill_between(xs, lower, upper, color=color, alpha=0.15, label=f'Error {name}')
+
+    # Add a y=x graph (dashed)
+    plt.plot([LEFT_BOUND, RIGHT_BOUND], [LEFT_BOUND, RIGHT_BOUND], color='crimson', linestyle='--',
+             label='y=x (Predicted Year = Actual Year)')
+
+    # Mark and label where each regression hits y=x (with bootstrap intervals if we have them)
+    for i, (year, interval) in enumerate(zip(crossings, intervals)):
+        if year is None:
+            continue
+        plt.plot(year, year, 'ro', markersize=10, label=(
+            'AGI extrapolations (when the\nMetaculus prediction = the actual\nyear at the observed update rate))'
+            if i == 0 else None))
+        if interval is not None:
+            lower, _, upper = interval
+            plt.errorbar(year, year, xerr=[[year - lower], [upper - year]], color='red', capsize=4)
+        plt.text(year, year + 2, f'AGI: {year:.2f}\n({decimal_year_to_date(year).strftime("%Y %b %d")})')
+
+    plt.legend()
+    plt.ylim(bottom=2020, top=2065)
+    plt.xticks(rotation=30)
+    plt.xlabel('Prediction Dates')
+    plt.ylabel('Predicted Date of AGI')
+    plt.title('Metaculus Date of Strong AGI Extrapolation (Linear)')
+
+    # Format the graph big and pretty
+    plt.gcf().set_size_inches(8, 6)
+    plt.tight_layout()
+
+    plt.savefig(output_path)
+    # plt.show()
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Extrapolate the Metaculus AGI prediction history.')
+    parser.add_argument('--input', default=None,
+                        help='Prediction store dir or JSON (default: the store if it exists, else predictions.json)')
+    parser.add_argument('--split-point', type=float, default=SPLIT_POINT, help='Start year of the second fit')
+    parser.add_argument('--no-plot', action='store_true', help='Only print the fitted numbers')
+    parser.add_argument('--bootstrap', type=int, default=0, help='Number of bootstrap resamples for AGI date intervals')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Bootstrap interval coverage')
+    parser.add_argument('--seed', type=int, default=None, help='Bootstrap random seed')
+    parser.add_argument('--workers', type=int, default=None, help='Bootstrap processes (default: all cores)')
+    parser.add_argument('--output', default='metaculus_strong_agi_extrapolation_linear.png')
+    args = parser.parse_args()
+
+    x, y = load_predictions(args.input)
+
+    # Fit all the data, then just the data after the split point
+    after_split = x > args.split_point
+    fits = [fit_line(x, y), fit_line(x[after_split], y[after_split])]
+    crossings = [crossing_year(slope, intercept) for slope, intercept in fits]
+
+    for name, (slope, _), year in zip(['Full', f'Post-{args.split_point:g}'], fits, crossings):
+        if year is None:
+            print(f'{name}: slope {slope}, never crosses y=x')
+        else:
+            print(f'{name}: slope {slope}, AGI {year:.4f} ({decimal_year_to_date(year).strftime("%Y %b %d")})')
+
+    # Resample each fit's predictions to get an interval on its AGI date
+    intervals = [None, None]
+    if args.bootstrap > 0:
+        for i, (name, mask) in enumerate([('Full', np.ones_like(after_split)),
+                                          (f'Post-{args.split_point:g}', after_split)]):
+            samples = bootstrap_crossings(x[mask], y[mask], args.bootstrap, seed=args.seed, workers=args.workers)
+            intervals[i] = lower, median, upper = percentile_interval(samples, args.confidence)
+            print(f'{name}: {args.confidence:.0%} bootstrap interval {lower:.2f} to {upper:.2f} '
+                  f'(median {median:.2f}, {args.bootstrap} resamples)')
+
+    if not args.no_plot:
+        plot(x, y, fits, crossings, intervals, args.split_point, args.output)
+
+    print('Finished!')
+
+
+if __name__ == '__main__':
+    main()
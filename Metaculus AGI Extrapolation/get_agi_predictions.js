@@ -1,5 +1,9 @@
 // Console JS for getting the predictions from the AGI Metaculus question
+// Set SINCE to the store's high_water_mark (prediction_store/_meta.json) to only get new predictions
+const SINCE = null
+const toDate = (time) => new Date(typeof time === 'number' ? time * 1000 : time)
 let output = []
 for (const [i, prediction] of Object.entries(window.metacData.question.community_prediction.history))
-    output.push({ 'date_of_prediction': prediction.time, 'agi_prediction': prediction.x1.q2 * (2200 - 2020) + 2020 })
-console.log(output)
\ No newline at end of file
+    if (SINCE === null || toDate(prediction.time) > new Date(SINCE))
+        output.push({ 'date_of_prediction': prediction.time, 'agi_prediction': prediction.x1.q2 * (2200 - 2020) + 2020 })
+console.log(output)
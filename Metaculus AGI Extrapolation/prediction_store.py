@@ -0,0 +1,125 @@
+"""
+Append-only local store of the Metaculus AGI prediction history.
+
+Predictions are kept as Parquet files partitioned by month, with the decimal
+year precomputed at ingest time. A high-water mark (the newest prediction time
+stored) lets each ingest only append predictions newer than what's already
+there, so `get_agi_predictions.js` output can be merged in incrementally.
+
+Usage:
+    python prediction_store.py predictions.json [more.json ...]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import tempfile
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prediction_store')
+META_FILE = '_meta.json'
+
+
+def read_meta(store_dir=STORE_DIR):
+    """The store's metadata, e.g. {"high_water_mark": "2023-05-01T12:00:00+00:00", "num_rows": 1234}."""
+    try:
+        with open(os.path.join(store_dir, META_FILE), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {'high_water_mark': None, 'num_rows': 0}
+
+
+def write_meta(meta, store_dir=STORE_DIR):
+    """Replace the metadata atomically so a crash never leaves a torn high-water mark."""
+    fd, temp_path = tempfile.mkstemp(dir=store_dir, prefix='.', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as file:
+        json.dump(meta, file, indent=2)
+    os.replace(temp_path, os.path.join(store_dir, META_FILE))
+
+
+def exists(store_dir=STORE_DIR):
+    return os.path.exists(os.path.join(store_dir, META_FILE))
+
+
+def parse_time(value):
+    """Prediction time as an aware UTC datetime (ISO strings or epoch seconds)."""
+    if isinstance(value, (int, float)):
+        return datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+    parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.astimezone(datetime.timezone.utc)
+
+
+def ingest(json_path, store_dir=STORE_DIR):
+    """Append predictions newer than the high-water mark from a JSON list. Returns how many were added."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    os.makedirs(store_dir, exist_ok=True)
+    meta = read_meta(store_dir)
+    high_water_mark = parse_time(meta['high_water_mark']) if meta['high_water_mark'] else None
+
+    with open(json_path, 'r', encoding='utf-8') as file:
+        predictions = json.load(file)
+
+    times = []
+    agi_predictions = []
+    for prediction in predictions:
+        time = parse_time(prediction['date_of_prediction'])
+        if high_water_mark is None or time > high_water_mark:
+            times.append(time)
+            agi_predictions.append(float(prediction['agi_prediction']))
+    if not times:
+        return 0
+
+    # Same convention as the analysis: year + dayofyear / 365, in UTC
+    decimal_years = [time.year + time.timetuple().tm_yday / 365 for time in times]
+    table = pa.table({
+        'date_of_prediction': pa.array([time.replace(tzinfo=None) for time in times], pa.timestamp('ms')),
+        'decimal_year': pa.array(decimal_years, pa.float64()),
+        'agi_prediction': pa.array(agi_predictions, pa.float64()),
+        'month': pa.array([time.strftime('%Y-%m') for time in times], pa.string()),
+    })
+
+    # New files per batch, so existing partitions are only ever appended to
+    batch_id = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    ds.write_dataset(
+        table,
+        store_dir,
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([('month', pa.string())]), flavor='hive'),
+        basename_template=f'batch-{batch_id}-{{i}}.parquet',
+        existing_data_behavior='overwrite_or_ignore',
+    )
+
+    write_meta({
+        'high_water_mark': max(times).isoformat(),
+        'num_rows': meta['num_rows'] + len(times),
+    }, store_dir)
+    return len(times)
+
+
+def load(columns=('decimal_year', 'agi_prediction'), store_dir=STORE_DIR):
+    """Load just the needed columns from the store as a memory-mapped Arrow table."""
+    import pyarrow.parquet as pq
+
+    return pq.read_table(store_dir, columns=list(columns), memory_map=True, partitioning='hive')
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Merge new Metaculus AGI predictions into the local store.')
+    parser.add_argument('json_files', nargs='+', help='JSON lists like predictions.json')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    args = parser.parse_args()
+
+    for json_path in args.json_files:
+        num_added = ingest(json_path, args.store_dir)
+        print(f'{json_path}: added {num_added} new predictions')
+    meta = read_meta(args.store_dir)
+    print(f'Store has {meta["num_rows"]} predictions up to {meta["high_water_mark"]}')
+
+
+if __name__ == '__main__':
+    main()
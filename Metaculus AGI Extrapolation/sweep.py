@@ -0,0 +1,163 @@
+"""
+Sweep every split point and rolling window over the Metaculus AGI predictions
+to see how sensitive the extrapolated AGI date is to the choice of window.
+
+Cumulative sums of (1, x, y, x^2, xy) make each window's least squares fit
+O(1), so thousands of regressions are a handful of vectorized array ops.
+
+Outputs:
+- sweep_split_points.csv: slope and AGI crossing for a fit from each split point to the end
+- sweep_rolling_windows.csv: the same for fixed-length windows starting at every prediction
+- sweep_crossing_heatmap.png: AGI crossing year for every (window start, window end) pair
+"""
+
+import argparse
+
+import numpy as np
+
+from agi_fit import load_predictions
+
+
+class PrefixSums:
+    """Cumulative sufficient statistics for O(1) least squares on any contiguous window of sorted points."""
+
+    def __init__(self, x, y):
+        order = np.argsort(x, kind='stable')
+        self.x = x[order]
+        self.y = y[order]
+        # Center x for numerical stability (years squared are ~4e6)
+        self.x0 = self.x[0] if len(self.x) else 0.0
+        xc = self.x - self.x0
+
+        def cumulative(values):
+            return np.concatenate([[0.0], np.cumsum(values)])
+
+        self.n = cumulative(np.ones_like(xc))
+        self.sx = cumulative(xc)
+        self.sy = cumulative(self.y)
+        self.sxx = cumulative(xc * xc)
+        self.sxy = cumulative(xc * self.y)
+
+    def fit(self, starts, ends):
+        """
+        Fit y = slope * x + intercept on the points [start, end) for each pair of index arrays.
+
+        Returns (slope, intercept, crossing year) arrays, with NaN where a window has
+        fewer than two distinct x values or its line is parallel to y = x.
+        """
+        starts = np.asarray(starts)
+        ends = np.asarray(ends)
+        n = self.n[ends] - self.n[starts]
+        sx = self.sx[ends] - self.sx[starts]
+        sy = self.sy[ends] - self.sy[starts]
+        sxx = self.sxx[ends] - self.sxx[starts]
+        sxy = self.sxy[ends] - self.sxy[starts]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            denominator = n * sxx - sx * sx
+            slope = np.where(denominator > 0, (n * sxy - sx * sy) / denominator, np.nan)
+            intercept_centered = (sy - slope * sx) / n
+            intercept = intercept_centered - slope * self.x0
+            crossing = np.where(slope != 1, intercept / (1 - slope), np.nan)
+        return slope, intercept, crossing
+
+
+def split_point_sweep(prefix, min_points):
+    """Fit from every prediction to the end of the history."""
+    num_points = len(prefix.x)
+    starts = np.arange(0, max(0, num_points - min_points + 1))
+    ends = np.full_like(starts, num_points)
+    slope, _, crossing = prefix.fit(starts, ends)
+    return {
+        'split_point': prefix.x[starts],
+        'num_points': ends - starts,
+        'slope': slope,
+        'agi_crossing': crossing,
+    }
+
+
+def rolling_window_sweep(prefix, window_years, min_points):
+    """Fit every window of each length (in years) starting at each prediction."""
+    columns = {'window_years': [], 'window_start': [], 'num_points': [], 'slope': [], 'agi_crossing': []}
+    for window in window_years:
+        starts = np.arange(len(prefix.x))
+        ends = np.searchsorted(prefix.x, prefix.x + window, side='right')
+        valid = ends - starts >= min_points
+        starts, ends = starts[valid], ends[valid]
+        slope, _, crossing = prefix.fit(starts, ends)
+        columns['window_years'].append(np.full(len(starts), window))
+        columns['window_start'].append(prefix.x[starts])
+        columns['num_points'].append(ends - starts)
+        columns['slope'].append(slope)
+        columns['agi_crossing'].append(crossing)
+    return {name: np.concatenate(values) if values else np.array([]) for name, values in columns.items()}
+
+
+def crossing_grid(prefix, min_points, max_cells):
+    """AGI crossing for every (start, end) window, subsampled to at most max_cells per side."""
+    num_points = len(prefix.x)
+    positions = np.unique(np.linspace(0, num_points, min(num_points + 1, max_cells)).astype(int))
+    starts = positions[:, None]
+    ends = positions[None, :]
+    _, _, crossing = prefix.fit(np.broadcast_to(starts, (len(positions),) * 2),
+                                np.broadcast_to(ends, (len(positions),) * 2))
+    crossing = np.where(ends - starts >= min_points, crossing, np.nan)
+    # Window boundaries as years (the end boundary is the last point inside the window)
+    start_years = prefix.x[np.minimum(positions, num_points - 1)]
+    end_years = prefix.x[np.maximum(positions - 1, 0)]
+    return start_years, end_years, crossing
+
+
+def plot_heatmap(start_years, end_years, crossing, output_path, vmin, vmax):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(8, 7))
+    plt.pcolormesh(end_years, start_years, crossing, cmap='viridis', vmin=vmin, vmax=vmax, shading='nearest')
+    plt.colorbar(label='Extrapolated AGI year')
+    plt.xlabel('Window end (prediction date)')
+    plt.ylabel('Window start (prediction date)')
+    plt.title('Metaculus Strong AGI Extrapolation: Sensitivity to Fit Window')
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=200)
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Sweep split points and rolling windows for the AGI extrapolation.')
+    parser.add_argument('--input', default=None,
+                        help='Prediction store dir or JSON (default: the store if it exists, else predictions.json)')
+    parser.add_argument('--min-points', type=int, default=10, help='Smallest window to fit')
+    parser.add_argument('--window-years', type=float, nargs='+', default=[0.5, 1, 2], help='Rolling window lengths')
+    parser.add_argument('--heatmap-cells', type=int, default=400, help='Max heatmap resolution per axis')
+    parser.add_argument('--vmin', type=float, default=2020, help='Heatmap color scale minimum year')
+    parser.add_argument('--vmax', type=float, default=2100, help='Heatmap color scale maximum year')
+    parser.add_argument('--no-plot', action='store_true', help='Only write the CSV tables')
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    x, y = load_predictions(args.input)
+    prefix = PrefixSums(x, y)
+
+    splits = pd.DataFrame(split_point_sweep(prefix, args.min_points))
+    splits.to_csv('sweep_split_points.csv', index=False)
+    rolling = pd.DataFrame(rolling_window_sweep(prefix, args.window_years, args.min_points))
+    rolling.to_csv('sweep_rolling_windows.csv', index=False)
+
+    # How much the answer moves with the split choice
+    finite = splits['agi_crossing'][np.isfinite(splits['agi_crossing'])]
+    print(f'{len(splits)} split points, {len(rolling)} rolling windows')
+    if len(finite):
+        quantiles = finite.quantile([0.05, 0.5, 0.95])
+        print(f'AGI crossing over split points: median {quantiles[0.5]:.2f} '
+              f'(5%-95%: {quantiles[0.05]:.2f} to {quantiles[0.95]:.2f})')
+
+    if not args.no_plot:
+        plot_heatmap(*crossing_grid(prefix, args.min_points, args.heatmap_cells),
+                     'sweep_crossing_heatmap.png', args.vmin, args.vmax)
+
+    print('Finished!')
+
+
+if __name__ == '__main__':
+    main()
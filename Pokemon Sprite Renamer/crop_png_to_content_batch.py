@@ -3,18 +3,30 @@ Crops images in a folder to the smallest square bounding box around the non-tran
 and copies the cropped images to a new subfolder.
 """
 
+import argparse
 import os
 import shutil
-from PIL import Image
-from tqdm import tqdm
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from script_utils.image_cache import CACHE_DIR_NAME, add_cache_arguments, cache_from_args  # noqa: E402
+
+# Everything that changes the output, so cached crops are only reused for the same settings
+CACHE_PARAMS = {"operation": "crop_png_to_content_square", "version": 1}
 
 
 def main():
     """
     Main function to handle user input and image cropping.
     """
+    parser = argparse.ArgumentParser(description=__doc__.strip().replace("\n", " "))
+    parser.add_argument("folder_path", nargs="?", help="Folder of images (prompted for if omitted)")
+    add_cache_arguments(parser, os.path.join(os.path.dirname(os.path.abspath(__file__)), CACHE_DIR_NAME))
+    args = parser.parse_args()
+    cache = cache_from_args(args, CACHE_PARAMS)
+
     # Ask user for folder path
-    folder_path = input("Enter the folder path: ")
+    folder_path = args.folder_path or input("Enter the folder path: ")
 
     # Create a subfolder in the input folder
     subfolder_path = os.path.join(folder_path, "cropped")
@@ -34,11 +46,22 @@ def main():
         and (f.endswith(".png") or f.endswith(".jpg") or f.endswith(".jpeg"))
     ]
 
+    from PIL import Image
+    from tqdm import tqdm
+
     # Iterate over files in the folder with a progress bar
     for filename in tqdm(files, desc="Cropping images"):
+        input_path = os.path.join(folder_path, filename)
+        output_path = os.path.join(subfolder_path, filename)
         try:
+            # Reuse the crop of an identical image from this or an earlier run
+            if cache is not None:
+                key = cache.key(input_path, output_path)
+                if cache.get(key, output_path):
+                    continue
+
             # Open the image file
-            img = Image.open(os.path.join(folder_path, filename))
+            img = Image.open(input_path)
 
             # Find the bounding box
             bbox = list(img.getbbox())
@@ -69,10 +92,14 @@ def main():
             cropped_img = img.crop(bbox)
 
             # Save the cropped image to the subfolder
-            cropped_img.save(os.path.join(subfolder_path, filename))
+            cropped_img.save(output_path)
+            if cache is not None:
+                cache.put(key, output_path)
         except Exception as exc:  # pylint: disable=broad-except
             tqdm.write(f"Error processing file {filename}: {exc}")
 
+    if cache is not None:
+        print(f"Reused {cache.hits} cached crops.")
     print("Done cropping images.")
 
 
@@ -5,10 +5,9 @@ Useful for making Slack emojis.
 Download sprite packs from https://veekun.com/dex/downloads
 """
 
+import argparse
 import os
 import shutil
-import requests
-from tqdm import tqdm
 
 
 def get_pokemon_name(index):
@@ -21,6 +20,8 @@ def get_pokemon_name(index):
     Returns:
         str: The name of the Pokemon.
     """
+    import requests
+
     response = requests.get(f"https://pokeapi.co/api/v2/pokemon/{index}", timeout=5)
     return response.json()["name"]
 
@@ -29,9 +30,14 @@ def main():
     """
     Main function to handle user input and file renaming.
     """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("folder_path", nargs="?", help="Folder of sprites (prompted for if omitted)")
+    parser.add_argument("suffix", nargs="?", help="Suffix for every file name (prompted for if omitted)")
+    args = parser.parse_args()
+
     # Ask user for folder path and suffix
-    folder_path = input("Enter the folder path: ")
-    suffix = input("Enter the suffix: ")
+    folder_path = args.folder_path or input("Enter the folder path: ")
+    suffix = args.suffix if args.suffix is not None else input("Enter the suffix: ")
 
     # Create a subfolder in the input folder
     subfolder_path = os.path.join(folder_path, "renamed_pokemon")
@@ -46,6 +52,8 @@ def main():
     # Get list of files in the folder
     files = [f for f in os.listdir(folder_path) if f != "renamed_pokemon"]
 
+    from tqdm import tqdm
+
     # Iterate over files in the folder with a progress bar
     for filename in tqdm(files, desc="Renaming files"):
         try:
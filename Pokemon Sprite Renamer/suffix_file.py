@@ -3,18 +3,23 @@ Appends a user-specified suffix to files in a folder, copies the renamed files t
 Useful for making Slack emojis.
 """
 
+import argparse
 import os
 import shutil
-from tqdm import tqdm
 
 
 def main():
     """
     Main function to handle user input and file renaming.
     """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("folder_path", nargs="?", help="Folder of files (prompted for if omitted)")
+    parser.add_argument("suffix", nargs="?", help="Suffix for every file name (prompted for if omitted)")
+    args = parser.parse_args()
+
     # Ask user for folder path and suffix
-    folder_path = input("Enter the folder path: ")
-    suffix = input("Enter the suffix: ")
+    folder_path = args.folder_path or input("Enter the folder path: ")
+    suffix = args.suffix if args.suffix is not None else input("Enter the suffix: ")
 
     # Create a subfolder in the input folder
     subfolder_path = os.path.join(folder_path, "suffixed")
@@ -29,6 +34,8 @@ def main():
     # Get list of files in the folder
     files = [f for f in os.listdir(folder_path) if f != "suffixed"]
 
+    from tqdm import tqdm
+
     # Iterate over files in the folder with a progress bar
     for filename in tqdm(files, desc="Suffixing files"):
         try:
@@ -0,0 +1,97 @@
+"""
+Per-request latency metrics for Claude queries, with a percentile summary.
+
+Each request records its time to first token (streaming only), total latency,
+output tokens per second, retries and time spent waiting before its successful
+attempt (rate limiting and retry backoff), so concurrency and model choices can be
+sized from measurements instead of guesses.
+"""
+
+import json
+import math
+import time
+
+PERCENTILES = [50, 90, 99]
+
+
+def percentile(sorted_values, q):
+    """Linearly interpolated q-th percentile (0-100) of an already sorted list."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class MetricsRecorder:
+    """Collects one metrics dict per request and summarizes them at the end of a batch."""
+
+    def __init__(self):
+        self.requests = []
+        self.started = time.perf_counter()
+
+    def record(self, ttft=None, latency=None, output_tokens=None, retries=0, wait_seconds=0.0, cached=False, error=False):
+        """Record one request and return its metrics (tokens/sec is derived from the others)."""
+        metrics = {
+            "ttft": ttft,
+            "latency": latency,
+            "output_tokens": output_tokens,
+            "tokens_per_second": None,
+            "retries": retries,
+            "wait_seconds": wait_seconds,
+            "cached": cached,
+            "error": error,
+        }
+        # Generation speed after the first token arrives
+        if output_tokens and latency is not None:
+            generation_time = latency - (ttft or 0.0)
+            if generation_time > 0:
+                metrics["tokens_per_second"] = output_tokens / generation_time
+        self.requests.append(metrics)
+        return metrics
+
+    def summary(self):
+        """Counts, means and percentiles over every API request (cache hits are only counted)."""
+        wall_time = time.perf_counter() - self.started
+        api_requests = [m for m in self.requests if not m["cached"] and not m["error"]]
+        summary = {
+            "requests": len(self.requests),
+            "cached": sum(m["cached"] for m in self.requests),
+            "errors": sum(m["error"] for m in self.requests),
+            "retries": sum(m["retries"] for m in self.requests),
+            "wait_seconds": sum(m["wait_seconds"] for m in self.requests),
+            "wall_time": wall_time,
+            "requests_per_second": len(self.requests) / wall_time if wall_time > 0 else None,
+        }
+        for name in ["ttft", "latency", "tokens_per_second"]:
+            values = sorted(m[name] for m in api_requests if m[name] is not None)
+            if not values:
+                continue
+            summary[name] = {"mean": sum(values) / len(values)}
+            for q in PERCENTILES:
+                summary[name][f"p{q}"] = percentile(values, q)
+        return summary
+
+    def print_summary(self):
+        summary = self.summary()
+        print(
+            f"{summary['requests']} requests ({summary['cached']} cached, {summary['errors']} errors, "
+            f"{summary['retries']} retries, {summary['wait_seconds']:.1f}s waiting) in {summary['wall_time']:.1f}s"
+        )
+        for name, label, unit in [
+            ("ttft", "Time to first token", "s"),
+            ("latency", "Total latency", "s"),
+            ("tokens_per_second", "Output tokens/sec", ""),
+        ]:
+            if name not in summary:
+                continue
+            stats = summary[name]
+            percentiles = ", ".join(f"p{q} {stats[f'p{q}']:.2f}{unit}" for q in PERCENTILES)
+            print(f"- {label}: mean {stats['mean']:.2f}{unit} ({percentiles})")
+
+    def write_summary(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.summary(), file, indent=2)
@@ -0,0 +1,292 @@
+"""
+Run a whole JSONL file of prompts through Claude concurrently.
+
+Each input line is a JSON object like
+{"id": "q1", "prompt": "Is 2 + 2 = 4? Explain your answer."}
+with optional "model", "max_tokens" and "temperature" overrides. Results are
+appended to the output JSONL as each request completes, so partial output
+survives an interrupted run.
+
+Requests go through the async client with a bounded number in flight, a token
+bucket limiting requests per second, and retries with jittered exponential
+backoff. Pass --base-url to point it at a local mock server. Temperature 0
+responses are served from and saved to the on-disk ResponseCache unless
+--no-cache is passed.
+
+Every request's latency and output tokens/sec are recorded and summarized with
+percentiles at the end, with time spent waiting on the rate limit and retries
+kept out of them. With --stream, completions are streamed so time to first
+token is measured too (and printed live when --concurrency is 1).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from latency_metrics import MetricsRecorder
+from response_cache import DEFAULT_CACHE_PATH, ResponseCache
+
+DEFAULT_MODEL = "claude-2.0"
+DEFAULT_MAX_TOKENS = 1024
+DEFAULT_TEMPERATURE = 0.0
+
+# anthropic.HUMAN_PROMPT and AI_PROMPT, copied so building requests (and cache
+# lookups) doesn't need the SDK, which is only imported once a request is sent
+HUMAN_PROMPT = "\n\nHuman:"
+AI_PROMPT = "\n\nAssistant:"
+
+
+def retryable_errors():
+    """The API errors worth retrying."""
+    from anthropic import APIConnectionError, InternalServerError, RateLimitError
+
+    return (APIConnectionError, RateLimitError, InternalServerError)
+
+
+class TokenBucket:
+    """Async token bucket: allows `rate` acquisitions per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def read_prompts(path):
+    """Read prompt records from a JSONL file, giving each an id if it doesn't have one."""
+    records = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            record.setdefault("id", line_number)
+            records.append(record)
+    return records
+
+
+def build_request(record, args):
+    """Completion parameters for one prompt record."""
+    return {
+        "model": record.get("model", args.model),
+        "max_tokens_to_sample": record.get("max_tokens", args.max_tokens),
+        "prompt": f"{HUMAN_PROMPT} {record['prompt']}{AI_PROMPT}",
+        "temperature": record.get("temperature", args.temperature),
+    }
+
+
+class Echo:
+    """
+    Prints streamed text live. A retried attempt usually streams the same prefix
+    again, so only text past what was already printed is shown; if the retry
+    diverges, it's printed again in full after a marker.
+    """
+
+    def __init__(self):
+        self.printed = ""
+        self.attempt_text = ""
+
+    def start_attempt(self):
+        self.attempt_text = ""
+
+    def __call__(self, text):
+        self.attempt_text += text
+        if self.attempt_text.startswith(self.printed):
+            new_text = self.attempt_text[len(self.printed):]
+        elif self.printed.startswith(self.attempt_text):
+            return
+        else:
+            new_text = "\n[Retry differs, restarting]\n" + self.attempt_text
+        sys.stdout.write(new_text)
+        sys.stdout.flush()
+        self.printed = self.attempt_text
+
+    def finish(self):
+        print()
+        self.printed = ""
+        self.attempt_text = ""
+
+
+async def complete(client, request, stream, on_text=None):
+    """
+    Send one completion request.
+
+    Returns (completion text, seconds to the first token or None when not streaming).
+    """
+    started = time.perf_counter()
+    if not stream:
+        response = await client.completions.create(**request)
+        return response.completion, None
+    ttft = None
+    chunks = []
+    async for event in await client.completions.create(**request, stream=True):
+        if not event.completion:
+            continue
+        if ttft is None:
+            ttft = time.perf_counter() - started
+        chunks.append(event.completion)
+        if on_text is not None:
+            on_text(event.completion)
+    return "".join(chunks), ttft
+
+
+async def query_with_retries(client, request, bucket, args, on_text=None):
+    """
+    Send one completion request, retrying transient errors with full-jitter exponential backoff.
+
+    Returns (completion text, time to first token, latency, retries used, seconds spent waiting).
+    Time to first token and latency are for the successful attempt alone, timed from
+    after its rate limit wait. Waiting covers the rate limit and the retry backoff.
+    On failure, the exception gets the attempts' .retries and .wait_seconds.
+    """
+    retryable = retryable_errors()
+    wait_seconds = 0.0
+    for attempt in range(args.max_retries + 1):
+        waited = time.perf_counter()
+        await bucket.acquire()
+        wait_seconds += time.perf_counter() - waited
+        if on_text is not None:
+            on_text.start_attempt()
+        started = time.perf_counter()
+        try:
+            completion, ttft = await complete(client, request, args.stream, on_text)
+            return completion, ttft, time.perf_counter() - started, attempt, wait_seconds
+        except retryable as exc:
+            if attempt == args.max_retries:
+                exc.retries = attempt
+                exc.wait_seconds = wait_seconds
+                raise
+            backoff = random.uniform(0, min(args.backoff_cap, args.backoff_base * 2**attempt))
+            await asyncio.sleep(backoff)
+            wait_seconds += backoff
+    raise AssertionError("unreachable")
+
+
+async def run_batch(records, output_path, cache, metrics, args):
+    """Query every record concurrently and append each result to output_path as it finishes."""
+    from tqdm import tqdm
+
+    client = None
+
+    def get_client():
+        # Only load the SDK if some prompt isn't cached
+        nonlocal client
+        if client is None:
+            from anthropic import AsyncAnthropic
+
+            client = AsyncAnthropic(base_url=args.base_url, max_retries=0)
+        return client
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    bucket = TokenBucket(args.requests_per_second)
+
+    # Only echo tokens live when requests can't interleave on the terminal
+    on_text = Echo() if args.stream and args.concurrency == 1 else None
+
+    async def run_one(record):
+        request = build_request(record, args)
+        result = {"id": record["id"], "model": request["model"]}
+        completion = cache.get(request)
+        if completion is not None:
+            result.update(completion=completion, cached=True, metrics=metrics.record(cached=True))
+            return result
+        async with semaphore:
+            # Latency covers only the successful attempt; rate limit and backoff waits are kept separately
+            try:
+                completion, ttft, latency, retries, wait_seconds = await query_with_retries(
+                    get_client(), request, bucket, args, on_text
+                )
+            except Exception as exc:  # pylint: disable=broad-except
+                result.update(
+                    error=f"{type(exc).__name__}: {exc}",
+                    metrics=metrics.record(
+                        retries=getattr(exc, "retries", 0), wait_seconds=getattr(exc, "wait_seconds", 0.0), error=True
+                    ),
+                )
+                return result
+            if on_text is not None:
+                on_text.finish()
+            # The completions API doesn't report usage, so count the output with the client's tokenizer
+            output_tokens = await client.count_tokens(completion)
+            cache.put(request, completion)
+            result.update(
+                completion=completion,
+                metrics=metrics.record(
+                    ttft=ttft, latency=latency, output_tokens=output_tokens, retries=retries, wait_seconds=wait_seconds
+                ),
+            )
+            return result
+
+    num_errors = 0
+    with open(output_path, "a", encoding="utf-8") as output_file:
+        tasks = [asyncio.create_task(run_one(record)) for record in records]
+        for task in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Querying", disable=on_text is not None):
+            result = await task
+            if "error" in result:
+                num_errors += 1
+            output_file.write(json.dumps(result) + "\n")
+            output_file.flush()
+    if client is not None:
+        await client.close()
+    return num_errors
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through Claude concurrently.")
+    parser.add_argument("input_file", help="JSONL file of prompts")
+    parser.add_argument("output_file", help="JSONL file to append results to")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS)
+    parser.add_argument("--temperature", type=float, default=DEFAULT_TEMPERATURE)
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum requests in flight")
+    parser.add_argument("--requests-per-second", type=float, default=5.0, help="Token bucket refill rate")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--backoff-base", type=float, default=1.0, help="Seconds before the first retry (max)")
+    parser.add_argument("--backoff-cap", type=float, default=60.0, help="Longest wait between retries")
+    parser.add_argument("--base-url", default=None, help="API base URL (e.g. a local mock server)")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, help="SQLite response cache file")
+    parser.add_argument("--cache-max-entries", type=int, default=None, help="Evict LRU entries beyond this count")
+    parser.add_argument("--cache-max-mb", type=float, default=None, help="Evict LRU entries beyond this size")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache entirely")
+    parser.add_argument("--stream", action="store_true", help="Stream completions to measure time to first token")
+    parser.add_argument("--metrics-file", default=None, help="Also write the metrics summary to this JSON file")
+    args = parser.parse_args()
+
+    cache = ResponseCache(
+        args.cache_path,
+        max_entries=args.cache_max_entries,
+        max_bytes=None if args.cache_max_mb is None else int(args.cache_max_mb * 1024 * 1024),
+        enabled=not args.no_cache,
+    )
+    metrics = MetricsRecorder()
+    records = read_prompts(args.input_file)
+    num_errors = asyncio.run(run_batch(records, args.output_file, cache, metrics, args))
+    print(f"Finished {len(records)} prompts ({num_errors} errors).")
+    print(f"Cache: {cache.stats()}")
+    cache.close()
+
+    metrics.print_summary()
+    if args.metrics_file:
+        metrics.write_summary(args.metrics_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,40 @@
+import time
+
 from anthropic import Anthropic, HUMAN_PROMPT, AI_PROMPT
 
+from response_cache import ResponseCache
+
+# Print tokens as they arrive and report time to first token
+STREAM = False
+
 claude = Anthropic()
+cache = ResponseCache()
 prompt = f"{HUMAN_PROMPT} Is 2 + 2 = 4? Explain your answer.{AI_PROMPT} No,"
-response = claude.completions.create(
-    model="claude-2.0",
-    max_tokens_to_sample=1024,
-    prompt=prompt,
-    temperature=0.0,
-)
-print(prompt + response.completion)
+request = {
+    "model": "claude-2.0",
+    "max_tokens_to_sample": 1024,
+    "prompt": prompt,
+    "temperature": 0.0,
+}
+completion = cache.get(request)
+if completion is not None:
+    print(prompt + completion)
+elif STREAM:
+    started = time.perf_counter()
+    ttft = None
+    chunks = []
+    print(prompt, end="", flush=True)
+    for event in claude.completions.create(**request, stream=True):
+        if event.completion and ttft is None:
+            ttft = time.perf_counter() - started
+        chunks.append(event.completion)
+        print(event.completion, end="", flush=True)
+    latency = time.perf_counter() - started
+    completion = "".join(chunks)
+    cache.put(request, completion)
+    if ttft is not None:
+        print(f"\n\nTime to first token: {ttft:.2f}s, total latency: {latency:.2f}s")
+else:
+    completion = claude.completions.create(**request).completion
+    cache.put(request, completion)
+    print(prompt + completion)
@@ -0,0 +1,120 @@
+"""
+Content-addressed on-disk cache for Claude completions.
+
+Responses are stored in SQLite keyed by a SHA-256 of the request parameters, so
+re-running a prompt set only pays for prompts that changed. Only temperature 0
+requests are cached, since those are the ones deterministic enough to reuse.
+Least-recently-used entries are evicted once the cache goes over its entry or
+size limits.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".response_cache.sqlite3")
+
+
+def request_key(request):
+    """Stable hash of the request parameters (model, prompt, temperature, max tokens, ...)."""
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed completion cache with LRU eviction and hit/miss counters."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=None, max_bytes=None, enabled=True):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.connection = None
+        if not enabled:
+            return
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                request TEXT NOT NULL,
+                completion TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self.connection.commit()
+
+    @staticmethod
+    def cacheable(request):
+        return request.get("temperature", 1.0) == 0.0
+
+    def get(self, request):
+        """Return the cached completion for a request, or None on a miss."""
+        if not self.enabled or not self.cacheable(request):
+            return None
+        key = request_key(request)
+        row = self.connection.execute("SELECT completion FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.connection.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.connection.commit()
+        return row[0]
+
+    def put(self, request, completion):
+        """Store a completion, then evict old entries if over the limits."""
+        if not self.enabled or not self.cacheable(request):
+            return
+        now = time.time()
+        request_json = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        size = len(request_json.encode("utf-8")) + len(completion.encode("utf-8"))
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses (key, request, completion, size, created, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+            (request_key(request), request_json, completion, size, now, now),
+        )
+        self.evict()
+        self.connection.commit()
+
+    def evict(self):
+        """Drop least-recently-used entries until within max_entries and max_bytes."""
+        if self.max_entries is not None:
+            self.connection.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        if self.max_bytes is not None:
+            total_bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total_bytes > self.max_bytes:
+                keys_to_delete = []
+                for key, size in self.connection.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                    if total_bytes <= self.max_bytes:
+                        break
+                    keys_to_delete.append((key,))
+                    total_bytes -= size
+                self.connection.executemany("DELETE FROM responses WHERE key = ?", keys_to_delete)
+
+    def stats(self):
+        """Hit/miss counts for this run plus the cache's current size."""
+        stats = {"hits": self.hits, "misses": self.misses}
+        lookups = self.hits + self.misses
+        stats["hit_rate"] = self.hits / lookups if lookups else 0.0
+        if self.enabled:
+            entries, total_bytes = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            stats["entries"] = entries
+            stats["bytes"] = total_bytes
+        return stats
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
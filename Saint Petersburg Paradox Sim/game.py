@@ -1,6 +1,13 @@
+import argparse
+import os
 import random
-from matplotlib import pyplot as plt
-from tqdm import tqdm
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from script_utils.instrumentation import add_profile_argument, count, enable_from_args, stage  # noqa: E402
+
+ALL_MAX_FLIPS = [1, 2, 3, 4, 5, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+NUM_SIMULATIONS = [10, 1000, 10000, 100000, 1000000, 10000000, 100000000, 1000000000]
 
 # simulate a single game of the Saint Petersburg Paradox
 
@@ -28,55 +35,74 @@ def simulate_games(p, max_flips, n):
     return total_return / n
 
 
-all_max_flips = [1, 2, 3, 4, 5, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
-for num_simulations in [10, 1000, 10000, 100000, 1000000, 10000000, 100000000, 1000000000]:
-    # Print which simulation we're on
-    print(f'Simulating {num_simulations} games...')
-
-    # Simulate the game with two different coins for a variety of maximum flips
-    expected_values_5050 = []
-    expected_values_4951 = []
-    expected_values_4852 = []
-    for max_flips in tqdm(all_max_flips):
-
-        # simulate the Saint Petersburg Paradox with a 50-50 coin
-        ev_50 = simulate_games(0.5, 20, num_simulations)
-        # print(ev_50)
-
-        # simulate the Saint Petersburg Paradox with a 49-51 coin
-        ev_51 = simulate_games(0.51, 20, num_simulations)
-        # print(ev_51)
-
-        # simulate the Saint Petersburg Paradox with a 48-52 coin
-        ev_52 = simulate_games(0.52, 20, num_simulations)
-        # print(ev_52)
-
-        # Store the expected values
-        expected_values_5050.append(ev_50)
-        expected_values_4951.append(ev_51)
-        expected_values_4852.append(ev_52)
-
-    # Print the results, neatly formatted into a table so each column is aligned
-    print('Maximum number of flips\tEV 50-50\tEV 49-51\tEV 48-52')
-    for i in range(len(all_max_flips)):
-        print(
-            f'{all_max_flips[i]}\t\t\t{expected_values_5050[i]}\t\t{expected_values_4951[i]}\t\t{expected_values_4852[i]}')
-    # Plot the expected values
-    plt.clf()
-    plt.plot(all_max_flips, expected_values_5050, label='50-50')
-    plt.plot(all_max_flips, expected_values_4951, label='49-51')
-    plt.plot(all_max_flips, expected_values_4852, label='48-52')
-    plt.xlabel('Maximum number of flips')
-    plt.ylabel('Expected value')
-    plt.title('Expected value of the Saint Petersburg Paradox')
-    plt.legend()
-    # plt.show()
-
-    # Save the plot
-    plt.savefig(f'saint_petersburg_paradox_plot_{num_simulations}.png')
-
-    # Save the data
-    with open(f'saint_petersburg_paradox_data_{num_simulations}.txt', 'w') as f:
-        f.write('Maximum number of flips,Expected value 50-50,Expected value 49-51,Expected value 48-52')
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Simulate the Saint Petersburg Paradox with fair and biased coins.')
+    parser.add_argument('--num-simulations', type=int, nargs='+', default=NUM_SIMULATIONS,
+                        help='Numbers of games to simulate, one data file and plot each')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    enable_from_args(args)
+
+    from matplotlib import pyplot as plt
+    from tqdm import tqdm
+
+    all_max_flips = ALL_MAX_FLIPS
+    for num_simulations in args.num_simulations:
+        # Print which simulation we're on
+        print(f'Simulating {num_simulations} games...')
+
+        # Simulate the game with two different coins for a variety of maximum flips
+        with stage('simulate'):
+            expected_values_5050 = []
+            expected_values_4951 = []
+            expected_values_4852 = []
+            for max_flips in tqdm(all_max_flips):
+
+                # simulate the Saint Petersburg Paradox with a 50-50 coin
+                ev_50 = simulate_games(0.5, 20, num_simulations)
+                # print(ev_50)
+
+                # simulate the Saint Petersburg Paradox with a 49-51 coin
+                ev_51 = simulate_games(0.51, 20, num_simulations)
+                # print(ev_51)
+
+                # simulate the Saint Petersburg Paradox with a 48-52 coin
+                ev_52 = simulate_games(0.52, 20, num_simulations)
+                # print(ev_52)
+
+                # Store the expected values
+                expected_values_5050.append(ev_50)
+                expected_values_4951.append(ev_51)
+                expected_values_4852.append(ev_52)
+        count('games', 3 * len(all_max_flips) * num_simulations)
+
+        # Print the results, neatly formatted into a table so each column is aligned
+        print('Maximum number of flips\tEV 50-50\tEV 49-51\tEV 48-52')
         for i in range(len(all_max_flips)):
-            f.write(f'{all_max_flips[i]},{expected_values_5050[i]},{expected_values_4951[i]},{expected_values_4852[i]}')
+            print(
+                f'{all_max_flips[i]}\t\t\t{expected_values_5050[i]}\t\t{expected_values_4951[i]}\t\t{expected_values_4852[i]}')
+        with stage('plot'):
+            # Plot the expected values
+            plt.clf()
+            plt.plot(all_max_flips, expected_values_5050, label='50-50')
+            plt.plot(all_max_flips, expected_values_4951, label='49-51')
+            plt.plot(all_max_flips, expected_values_4852, label='48-52')
+            plt.xlabel('Maximum number of flips')
+            plt.ylabel('Expected value')
+            plt.title('Expected value of the Saint Petersburg Paradox')
+            plt.legend()
+            # plt.show()
+
+            # Save the plot
+            plt.savefig(f'saint_petersburg_paradox_plot_{num_simulations}.png')
+
+        # Save the data
+        with open(f'saint_petersburg_paradox_data_{num_simulations}.txt', 'w') as f:
+            f.write('Maximum number of flips,Expected value 50-50,Expected value 49-51,Expected value 48-52')
+            for i in range(len(all_max_flips)):
+                f.write(f'{all_max_flips[i]},{expected_values_5050[i]},{expected_values_4951[i]},{expected_values_4852[i]}')
+
+
+if __name__ == '__main__':
+    main()
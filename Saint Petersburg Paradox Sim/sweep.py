@@ -0,0 +1,174 @@
+"""
+Sweep the Saint Petersburg game over a dense grid of coin biases, maximum flips
+and sample sizes in a single pass.
+
+As in game.py's play_game(), a game pays 2^max_flips if its first max_flips
+flips all come up heads (probability p^max_flips) and 0 otherwise. So a game is
+fully described by K, the number of heads before the first tails, which is
+geometric: K = floor(log U / log p) for a uniform U. One stream of uniform draws
+is shared by every p (so differences between coins aren't noise from separate
+simulations), and each chunk of draws is turned into K for the whole p grid at
+once by broadcasting. A bincount of K per p followed by a reverse cumulative sum
+counts the games that reached every max_flips at once, and the sample sizes are
+nested prefixes of the same stream.
+
+Outputs:
+- sweep_surface.csv: EV, variance and payout quantiles per (games, p, max_flips)
+- sweep_surface.npz: the same as arrays
+- sweep_ev_<games>.png: EV heatmap over p and max_flips for the largest sample size
+"""
+
+import argparse
+import csv
+import time
+
+import numpy as np
+
+P_MIN = 0.40
+P_MAX = 0.60
+P_STEP = 0.001
+MAX_FLIPS = 100
+SAMPLE_SIZES = [10, 1000, 10000, 100000, 1000000, 10000000]
+QUANTILES = [0.5, 0.9, 0.99, 0.999]
+# Elements of the (p, draws) array per chunk (32 MB of float64)
+CHUNK_ELEMENTS = 1 << 22
+
+
+def p_grid(p_min, p_max, p_step):
+    """Coin biases from p_min to p_max inclusive (rounded so 0.5 is exactly 0.5)."""
+    num_steps = int(round((p_max - p_min) / p_step))
+    return np.round(p_min + p_step * np.arange(num_steps + 1), 10)
+
+
+def reach_counts(p, max_flips, sample_sizes, seed=0, chunk_elements=CHUNK_ELEMENTS):
+    """
+    Count how many of the first n games got at least m heads in a row, for every
+    coin in p, m from 0 to max_flips and n in sample_sizes (ascending, so each is
+    a prefix of the next).
+
+    Returns an int64 array of shape (len(sample_sizes), len(p), max_flips + 1).
+    """
+    p = np.asarray(p, dtype=np.float64)
+    inverse_log_p = 1.0 / np.log(p)
+    rng = np.random.default_rng(seed)
+    chunk_size = max(1, chunk_elements // len(p))
+    # Offset each coin's K values so one bincount histograms every coin at once
+    offsets = (np.arange(len(p)) * (max_flips + 1))[:, None]
+
+    histogram = np.zeros(len(p) * (max_flips + 1), dtype=np.int64)
+    snapshots = []
+    position = 0
+    for sample_size in sample_sizes:
+        while position < sample_size:
+            size = min(chunk_size, sample_size - position)
+            # log U for U uniform on (0, 1], so the log is finite
+            log_u = np.log1p(-rng.random(size))
+            # K = floor(log U / log p) for every coin at once, capped at max_flips
+            # since every K past that pays the same
+            heads = np.minimum(np.floor(log_u[None, :] * inverse_log_p[:, None]), max_flips).astype(np.int64)
+            histogram += np.bincount((heads + offsets).ravel(), minlength=histogram.size)
+            position += size
+
+        # Games with K >= m is the reverse cumulative sum of the K histogram
+        counts = histogram.reshape(len(p), max_flips + 1)
+        snapshots.append(np.cumsum(counts[:, ::-1], axis=1)[:, ::-1])
+    return np.stack(snapshots)
+
+
+def surface_stats(reached, sample_sizes, max_flips, quantiles):
+    """
+    Per (sample size, p, max_flips) stats from reach_counts() output, for max_flips 1 to max_flips.
+
+    Returns a dict of arrays: win_rate, ev, variance, ev_stderr, and q<level> for each quantile.
+    """
+    sizes = np.asarray(sample_sizes, dtype=np.float64)[:, None, None]
+    win_rate = reached[:, :, 1:] / sizes
+    payout = 2.0 ** np.arange(1, max_flips + 1)
+    # Each game pays 0 or 2^m, so the mean and variance follow from the win rate alone
+    ev = payout * win_rate
+    variance = payout ** 2 * win_rate * (1 - win_rate)
+    stats = {
+        'win_rate': win_rate,
+        'ev': ev,
+        'variance': variance,
+        'ev_stderr': np.sqrt(variance / sizes),
+    }
+    for level in quantiles:
+        # The payout quantile is 0 while at least `level` of games paid 0, else 2^m
+        stats[f'q{level:g}'] = np.where(1 - win_rate >= level, 0.0, payout)
+    return stats
+
+
+def write_csv(path, sample_sizes, p, max_flips, stats):
+    """Write one row per (games, p, max_flips) cell."""
+    names = list(stats)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['games', 'p', 'max_flips', 'exact_ev'] + names)
+        for i, sample_size in enumerate(sample_sizes):
+            for j, coin in enumerate(p):
+                for m in range(1, max_flips + 1):
+                    writer.writerow([sample_size, coin, m, (2 * coin) ** m] + [stats[name][i, j, m - 1] for name in names])
+
+
+def plot_ev(p, max_flips, ev, sample_size, output_path):
+    import matplotlib.pyplot as plt
+
+    with np.errstate(divide='ignore'):
+        log_ev = np.where(ev > 0, np.log10(ev), np.nan)
+    plt.figure(figsize=(9, 6))
+    plt.pcolormesh(p, np.arange(1, max_flips + 1), log_ev.T, cmap='viridis', shading='nearest')
+    plt.colorbar(label='log10(Expected value)')
+    plt.xlabel('Probability of heads (p)')
+    plt.ylabel('Maximum number of flips')
+    plt.title(f'Expected value of the Saint Petersburg Paradox ({sample_size} games, blank = no wins)')
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=200)
+    plt.close()
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Sweep the Saint Petersburg game over p, max flips and sample size.')
+    parser.add_argument('--p-min', type=float, default=P_MIN, help='Smallest probability of heads')
+    parser.add_argument('--p-max', type=float, default=P_MAX, help='Largest probability of heads')
+    parser.add_argument('--p-step', type=float, default=P_STEP, help='Probability grid spacing')
+    parser.add_argument('--max-flips', type=int, default=MAX_FLIPS, help='Sweep max_flips from 1 to this')
+    parser.add_argument('--sample-sizes', type=int, nargs='+', default=SAMPLE_SIZES, help='Numbers of games')
+    parser.add_argument('--quantiles', type=float, nargs='+', default=QUANTILES, help='Payout quantile levels')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the shared uniform stream')
+    parser.add_argument('--chunk-elements', type=int, default=CHUNK_ELEMENTS,
+                        help='Size of each (p, draws) block, to bound memory')
+    parser.add_argument('--output', default='sweep_surface', help='Output path without extension')
+    parser.add_argument('--no-plot', action='store_true', help='Only write the tables')
+    args = parser.parse_args()
+
+    p = p_grid(args.p_min, args.p_max, args.p_step)
+    sample_sizes = sorted(set(args.sample_sizes))
+    print(f'Sweeping {len(p)} coins x {args.max_flips} max flips x {len(sample_sizes)} sample sizes '
+          f'({sample_sizes[-1]} games)...')
+
+    started = time.perf_counter()
+    reached = reach_counts(p, args.max_flips, sample_sizes, args.seed, args.chunk_elements)
+    stats = surface_stats(reached, sample_sizes, args.max_flips, args.quantiles)
+    print(f'Simulated in {time.perf_counter() - started:.1f}s')
+
+    np.savez_compressed(f'{args.output}.npz', p=p, sample_sizes=np.array(sample_sizes),
+                        max_flips=np.arange(1, args.max_flips + 1), **stats)
+    write_csv(f'{args.output}.csv', sample_sizes, p, args.max_flips, stats)
+
+    # Print the fair coin's row like game.py, to sanity check against the exact EV of 1
+    fair = np.argmin(np.abs(p - 0.5))
+    print(f'Maximum number of flips\tEV p={p[fair]:g} ({sample_sizes[-1]} games)\tExact EV')
+    for m in [1, 2, 3, 4, 5, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]:
+        if m <= args.max_flips:
+            print(f'{m}\t\t\t{stats["ev"][-1, fair, m - 1]:.4g}\t\t\t{(2 * p[fair]) ** m:.4g}')
+
+    if not args.no_plot:
+        plot_ev(p, args.max_flips, stats['ev'][-1], sample_sizes[-1], f'sweep_ev_{sample_sizes[-1]}.png')
+
+    print('Finished!')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,38 @@
-"""Extends images to a square and fills the background with a blurred and darkened copy of the original image."""
+"""
+Extends images to a square and fills the background with a blurred and darkened copy of the original image.
 
+With --tiled, the output is built in horizontal bands: each band of the
+background is resized straight from the source (no cropped or extended copies),
+blurred with a halo of rows above and below so there are no seams, darkened,
+and has its slice of the foreground resized and composited onto it. Working
+memory is then a few bands plus the output, whatever the source resolution
+(JPEGs are also decoded at a reduced scale when that's still big enough).
+The foreground is resampled from the same transparent-edged square as the
+full-image path, so the two outputs differ by only a few levels of rounding.
+"""
+
+import math
 import os
+import sys
 import argparse
-from PIL import Image, ImageFilter, ImageEnhance
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from script_utils.image_cache import CACHE_DIR_NAME, add_cache_arguments, cache_from_args  # noqa: E402
+from script_utils.instrumentation import (  # noqa: E402
+    add_profile_argument, count, enable_from_args, merge_stats, run_collecting, stage, worker_initargs, worker_initializer)
 
 OUTPUT_DIMENSION = 3000
 BLUR_SIZE = 42
 DARKEN_FACTOR = 0.5
 INCLUDED_FILE_EXTENSIONS = ['.jpg', '.jpeg', '.png']
 
+# Output rows per band in --tiled mode
+BAND_HEIGHT = 256
+# Extra rows blurred above and below each band; the Gaussian is negligible beyond 3 radii
+HALO = 3 * BLUR_SIZE
+# Bump when the processing code changes its output, so cached images from before aren't reused
+CACHE_VERSION = 2
+
 
 def crop_to_square(img):
     """Minimally crop image to a centered square"""
@@ -23,6 +47,8 @@ def crop_to_square(img):
 
 def extend(image):
     """Extend an image to a square with a transparent background"""
+    from PIL import Image
+
     width, height = image.size
     if width == height:
         return image
@@ -36,11 +62,140 @@ def extend(image):
         return result
 
 
+def process_image(input_path, output_path):
+    """Square one image over its own blurred, darkened background and save it."""
+    from PIL import Image, ImageEnhance, ImageFilter
+
+    # Load the image
+    with stage('decode'):
+        background = Image.open(input_path)
+        background.load()
+        foreground = background.copy()
+
+    with stage('blur'):
+        # Crop the background to a square
+        background = crop_to_square(background)
+
+        # Resize it to the target size
+        background = background.resize((OUTPUT_DIMENSION, OUTPUT_DIMENSION))
+
+        # Blur it
+        background = background.filter(ImageFilter.GaussianBlur(radius=BLUR_SIZE))
+
+        # Darken it
+        darken_enhancer = ImageEnhance.Brightness(background)
+        background = darken_enhancer.enhance(DARKEN_FACTOR)
+
+    with stage('composite'):
+        # Composite the original image on top of it
+        foreground = extend(foreground)
+        foreground = foreground.resize((OUTPUT_DIMENSION, OUTPUT_DIMENSION))
+
+        # background.paste(foreground, (background.size[0]/2 - foreground.size[0]/2, background.size[1]/2 - foreground.size[1]/2), foreground)
+        background.paste(foreground, (0, 0), foreground)
+
+    # Save the output
+    with stage('encode'):
+        background.save(output_path)
+    count('images')
+
+
+def process_image_tiled(input_path, output_path, band_height=BAND_HEIGHT):
+    """process_image() in horizontal bands, with bounded working memory."""
+    from PIL import Image, ImageEnhance, ImageFilter
+
+    with stage('decode'):
+        source = Image.open(input_path)
+        # Let JPEGs decode at 1/2, 1/4 or 1/8 scale while both sides stay at least the output size
+        source.draft(source.mode, (OUTPUT_DIMENSION, OUTPUT_DIMENSION))
+        has_alpha = source.mode in ('RGBA', 'LA', 'PA') or 'transparency' in source.info
+        output_mode = 'RGBA' if has_alpha else 'RGB'
+        if source.mode != output_mode:
+            source = source.convert(output_mode)
+        source.load()
+
+    width, height = source.size
+    # The background is the centered square (as in crop_to_square), scaled to the output size
+    side = min(width, height)
+    left = (width - side) / 2
+    top = (height - side) / 2
+    background_scale = side / OUTPUT_DIMENSION
+    # The foreground is the image pasted on a transparent square at an integer offset
+    # (as in extend), then scaled down to the output size along with its edges
+    extended_side = max(width, height)
+    offset_left = int((extended_side - width) / 2)
+    offset_top = int((extended_side - height) / 2)
+    foreground_scale = extended_side / OUTPUT_DIMENSION
+    # Source rows outside a band that still affect it when resampling (bicubic reaches 2 pixels per scale step)
+    margin = math.ceil(2 * max(foreground_scale, 1)) + 1
+
+    blur_filter = ImageFilter.GaussianBlur(radius=BLUR_SIZE)
+    output = Image.new(output_mode, (OUTPUT_DIMENSION, OUTPUT_DIMENSION))
+    for band_top in range(0, OUTPUT_DIMENSION, band_height):
+        band_bottom = min(band_top + band_height, OUTPUT_DIMENSION)
+
+        with stage('blur'):
+            # Resize just this band (plus halo) of the background. Resizing with box= samples
+            # the source exactly like a full-size resize would, so bands line up.
+            halo_top = max(band_top - HALO, 0)
+            halo_bottom = min(band_bottom + HALO, OUTPUT_DIMENSION)
+            band = source.resize(
+                (OUTPUT_DIMENSION, halo_bottom - halo_top),
+                box=(left, top + halo_top * background_scale, left + side, top + halo_bottom * background_scale),
+            )
+            band = band.filter(blur_filter)
+            band = ImageEnhance.Brightness(band).enhance(DARKEN_FACTOR)
+            band = band.crop((0, band_top - halo_top, OUTPUT_DIMENSION, band_bottom - halo_top))
+
+        with stage('composite'):
+            # The rows of the extended square this band samples, and the source rows among them
+            strip_top = max(math.floor(band_top * foreground_scale) - margin, 0)
+            strip_bottom = min(math.ceil(band_bottom * foreground_scale) + margin, extended_side)
+            rows_top = max(strip_top - offset_top, 0)
+            rows_bottom = min(strip_bottom - offset_top, height)
+            if rows_top < rows_bottom:
+                # Just this strip of the extended square, so its transparent edges resample the same way
+                strip = Image.new('RGBA', (extended_side, strip_bottom - strip_top), (0, 0, 0, 0))
+                strip.paste(source.crop((0, rows_top, width, rows_bottom)),
+                            (offset_left, rows_top + offset_top - strip_top))
+                foreground = strip.resize(
+                    (OUTPUT_DIMENSION, band_bottom - band_top),
+                    box=(0, band_top * foreground_scale - strip_top,
+                         extended_side, band_bottom * foreground_scale - strip_top),
+                )
+                band.paste(foreground, (0, 0), foreground)
+            output.paste(band, (0, band_top))
+
+    with stage('encode'):
+        output.save(output_path)
+    count('images')
+
+
 def main():
     '''Main execution function.'''
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('input_dir', nargs='?', help='Folder of images to convert (prompted for if omitted)')
+    parser.add_argument('--output-dir', help='Where to save the squared images (default: <input_dir>/square)')
+    parser.add_argument('--tiled', action='store_true', help='Process each image in bands to bound memory use')
+    parser.add_argument('--band-height', type=int, default=BAND_HEIGHT, help='Output rows per band with --tiled')
+    parser.add_argument('--workers', type=int, default=1, help='Images to process in parallel')
+    add_cache_arguments(parser, os.path.join(os.path.dirname(os.path.abspath(__file__)), CACHE_DIR_NAME))
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    enable_from_args(args)
+
+    # Everything that changes the output, so cached images are only reused for the same settings
+    cache = cache_from_args(args, {
+        'operation': 'square_image_blur_bg',
+        'version': CACHE_VERSION,
+        'output_dimension': OUTPUT_DIMENSION,
+        'blur_size': BLUR_SIZE,
+        'darken_factor': DARKEN_FACTOR,
+        'band_height': args.band_height if args.tiled else None,
+    })
 
     # Get the input dir from user input
-    input_dir = input(
+    input_dir = args.input_dir or input(
         'Enter the folder path of the images you want to convert:\n')
 
     # Error checking
@@ -48,17 +203,15 @@ def main():
         print('Input path doesn\'t exist!')
         return
 
-    output_dir = os.path.join(input_dir, 'square')
+    output_dir = args.output_dir or os.path.join(input_dir, 'square')
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    # Make filters
-    blur_filter = ImageFilter.GaussianBlur(radius=BLUR_SIZE)
-
     # Get input images
     input_files = os.listdir(input_dir)
 
     # For each image in the input dir
+    jobs = []
     for image_filename in input_files:
         # Check that it's an image
         is_image = False
@@ -70,37 +223,72 @@ def main():
 
         # Get the path of the image
         input_path = os.path.join(input_dir, image_filename)
+        image_name_no_ext = os.path.splitext(image_filename)[0]
+        output_path = os.path.join(output_dir, f'{image_name_no_ext}.png')
 
-        # Load the image
-        background = Image.open(input_path)
-        foreground = background.copy()
-
-        # Crop the background to a square
-        background = crop_to_square(background)
-
-        # Resize it to the target size
-        background = background.resize((OUTPUT_DIMENSION, OUTPUT_DIMENSION))
+        jobs.append((image_filename, input_path, output_path))
 
-        # Blur it
-        background = background.filter(blur_filter)
+    # Copy out cached results, and only process the first of any identical images
+    to_process = []
+    duplicates = {}
+    for image_filename, input_path, output_path in jobs:
+        key = None
+        if cache is not None:
+            with stage('cache'):
+                key = cache.key(input_path, output_path)
+                if cache.get(key, output_path):
+                    print(f'Reused {image_filename}')
+                    continue
+            if key in duplicates:
+                duplicates[key].append((image_filename, output_path))
+                continue
+            duplicates[key] = []
+        to_process.append((image_filename, input_path, output_path, key))
 
-        # Darken it
-        darken_enhancer = ImageEnhance.Brightness(background)
-        background = darken_enhancer.enhance(DARKEN_FACTOR)
+    def finish(image_filename, output_path, key):
+        print(f'Processed {image_filename}')
+        if cache is None:
+            return
+        cache.put(key, output_path)
+        for duplicate_filename, duplicate_output_path in duplicates[key]:
+            cache.get(key, duplicate_output_path)
+            print(f'Reused {duplicate_filename}')
 
-        # Composite the original image on top of it
-        foreground = extend(foreground)
-        foreground = foreground.resize((OUTPUT_DIMENSION, OUTPUT_DIMENSION))
+    if args.tiled:
+        process, extra_args = process_image_tiled, (args.band_height,)
+    else:
+        process, extra_args = process_image, ()
 
-        # background.paste(foreground, (background.size[0]/2 - foreground.size[0]/2, background.size[1]/2 - foreground.size[1]/2), foreground)
-        background.paste(foreground, (0, 0), foreground)
+    if args.workers <= 1:
+        for image_filename, input_path, output_path, key in to_process:
+            process(input_path, output_path, *extra_args)
+            finish(image_filename, output_path, key)
+        return
 
-        # Save the output
-        image_name_no_ext = os.path.splitext(image_filename)[0]
-        output_path = os.path.join(output_dir, f'{image_name_no_ext}.png')
-        background.save(output_path)
+    from concurrent.futures import ProcessPoolExecutor, as_completed
 
-        print(f'Processed {image_filename}')
+    # Workers send their stage timings back with each result, since they never write a report
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=worker_initializer,
+                             initargs=worker_initargs()) as executor:
+        futures = {
+            executor.submit(run_collecting, process, input_path, output_path, *extra_args):
+                (image_filename, output_path, key)
+            for image_filename, input_path, output_path, key in to_process
+        }
+        num_failed = 0
+        for future in as_completed(futures):
+            image_filename, output_path, key = futures[future]
+            # Report a bad image and carry on with the rest of the batch
+            try:
+                _, stats = future.result()
+            except Exception as exc:  # pylint: disable=broad-except
+                num_failed += 1
+                print(f'Failed {image_filename}: {type(exc).__name__}: {exc}')
+                continue
+            merge_stats(stats)
+            finish(image_filename, output_path, key)
+    if num_failed:
+        print(f'{num_failed} of {len(to_process)} images failed')
 
 
 if __name__ == '__main__':
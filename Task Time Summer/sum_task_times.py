@@ -10,11 +10,64 @@ Then, sum and output the total hours, but cumulatively next the each tas, e.g.:
 1.0 ICLR review plan
 1.75 update website and resume with papers
 2.25 inbox 0
+
+Pass log files (or - for stdin) to skip the prompts and run aggregate queries
+over many days instead, e.g.:
+python sum_task_times.py logs/*.txt --per-day --weekly --keyword ICLR --keyword inbox
 """
 
+import argparse
+
+
+def run_analytics(args: argparse.Namespace) -> None:
+    """Non-interactive mode: parse every log and print the requested aggregates."""
+    from task_log_analytics import TaskLog
+
+    if args.files:
+        log, skipped = TaskLog.from_paths(args.files)
+        for line in skipped:
+            print(f"⚠️ Skipping {line} because it has no hours or date.")
+    else:
+        log = TaskLog.load(args.load_store)
+    if args.save_store:
+        log.save(args.save_store)
+
+    print(f"{len(log.hours)} tasks, {log.hours.sum():.2f} hours total")
+    if args.per_day:
+        print("\nHours per day:")
+        for day, total in zip(*log.daily_totals()):
+            print(f"{day} {total:g}")
+    if args.weekly:
+        print("\nRolling 7-day hours:")
+        for day, total in zip(*log.rolling_sums(7)):
+            print(f"{day} {total:g}")
+    if args.keyword:
+        print("\nHours per keyword:")
+        for keyword, total in log.keyword_totals(args.keyword).items():
+            print(f"{keyword}: {total:g}")
+    if args.top_tasks:
+        print("\nTop tasks:")
+        for task, total in log.task_totals()[: args.top_tasks]:
+            print(f"{total:g} {task}")
+
 
 def main() -> None:
     """Main function."""
+    parser = argparse.ArgumentParser(description="Sum task hours, interactively or over many daily log files.")
+    parser.add_argument("files", nargs="*", help="Daily task log files (- for stdin)")
+    parser.add_argument("--per-day", action="store_true", help="Print total hours for each day")
+    parser.add_argument("--weekly", action="store_true", help="Print rolling 7-day totals")
+    parser.add_argument("--keyword", action="append", help="Print total hours of tasks containing this (repeatable)")
+    parser.add_argument("--top-tasks", type=int, default=0, help="Print the N tasks with the most hours")
+    parser.add_argument("--save-store", help="Save the parsed logs to this .npz file")
+    parser.add_argument("--load-store", help="Query a saved .npz store instead of parsing files")
+    parser.add_argument("--no-pause", action="store_true", help="Don't wait for Enter before closing")
+    args = parser.parse_args()
+
+    if args.files or args.load_store:
+        run_analytics(args)
+        return
+
     tasks = []
     print(
         "Paste in a list of tasks where each line has the fractional hours as the first word, then press Ctrl+Z (Windows) or Ctrl+D (Unix) to end input:"
@@ -41,7 +94,8 @@ def main() -> None:
             print(f"⚠️ Skipping {task} because {hours} is not a number.")
 
     # Pause before closing.
-    input("\nPress Enter to close...")
+    if not args.no_pause:
+        input("\nPress Enter to close...")
 
 
 if __name__ == "__main__":
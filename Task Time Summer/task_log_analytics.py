@@ -0,0 +1,140 @@
+"""
+Aggregate queries over many days of task time logs.
+
+Each log line has the fractional hours as the first word, like in sum_task_times.py:
+0.75 plot fixing
+0.25 ICLR review plan
+
+A log's date comes from its file name (e.g. 2024-01-05.txt or notes 2024-01-05.md),
+or from a line holding just a date (e.g. "2024-01-05" or "# 2024-01-05"), which
+also lets one file or stdin hold many days.
+
+Parsed logs are kept as a compact columnar store of (day, hours, task id) NumPy
+arrays, so per-day totals, keyword totals and rolling weekly sums are single
+vectorized bincount/cumsum passes.
+"""
+
+import datetime
+import re
+import sys
+
+import numpy as np
+
+DATE_PATTERN = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+DATE_LINE_PATTERN = re.compile(r'^#*\s*(\d{4}-\d{2}-\d{2})\s*$')
+
+
+def date_from_name(path):
+    """The first YYYY-MM-DD date in a file name, or None."""
+    match = DATE_PATTERN.search(path.replace('\\', '/').rsplit('/', 1)[-1])
+    return datetime.date.fromisoformat(match.group(0)) if match else None
+
+
+class TaskLog:
+    """Columnar store of task log entries: day (datetime64[D]), hours (float64) and task id (int32)."""
+
+    def __init__(self, days, hours, task_ids, tasks):
+        self.days = days
+        self.hours = hours
+        self.task_ids = task_ids
+        # Task text for each task id
+        self.tasks = tasks
+
+    @classmethod
+    def from_sources(cls, sources):
+        """
+        Parse (lines, default date) sources into one store.
+
+        Returns (log, skipped lines) where skipped lines didn't start with a number
+        or had no date.
+        """
+        days = []
+        hours = []
+        task_ids = []
+        task_index = {}
+        skipped = []
+        for lines, default_date in sources:
+            current_date = default_date
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                date_match = DATE_LINE_PATTERN.match(line)
+                if date_match:
+                    current_date = datetime.date.fromisoformat(date_match.group(1))
+                    continue
+                hours_text, _, task = line.partition(' ')
+                try:
+                    task_hours = float(hours_text)
+                except ValueError:
+                    skipped.append(line)
+                    continue
+                if current_date is None:
+                    skipped.append(line)
+                    continue
+                task = task.strip()
+                days.append(current_date.toordinal())
+                hours.append(task_hours)
+                task_ids.append(task_index.setdefault(task, len(task_index)))
+
+        # Ordinals -> datetime64[D] (ordinal 719163 is 1970-01-01)
+        days = (np.array(days, dtype=np.int64) - 719163).astype('datetime64[D]')
+        log = cls(days, np.array(hours, dtype=np.float64), np.array(task_ids, dtype=np.int32), list(task_index))
+        return log, skipped
+
+    @classmethod
+    def from_paths(cls, paths):
+        """Parse log files ('-' reads stdin)."""
+
+        def sources():
+            for path in paths:
+                if path == '-':
+                    yield sys.stdin, None
+                    continue
+                with open(path, 'r', encoding='utf-8') as file:
+                    yield file, date_from_name(path)
+
+        return cls.from_sources(sources())
+
+    def save(self, path):
+        """Save the store as a compressed .npz file."""
+        np.savez_compressed(path, days=self.days, hours=self.hours, task_ids=self.task_ids,
+                            tasks=np.array(self.tasks, dtype=object))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=True)
+        return cls(data['days'], data['hours'], data['task_ids'], list(data['tasks']))
+
+    def daily_totals(self):
+        """(every day from the first to the last log, total hours that day) with 0 for days without logs."""
+        if len(self.days) == 0:
+            return np.array([], dtype='datetime64[D]'), np.array([])
+        first = self.days.min()
+        offsets = (self.days - first).astype(np.int64)
+        totals = np.bincount(offsets, weights=self.hours)
+        return first + np.arange(len(totals)), totals
+
+    def rolling_sums(self, window_days=7):
+        """Trailing window sums of the daily totals (e.g. the last 7 days ending on each day)."""
+        days, totals = self.daily_totals()
+        cumulative = np.concatenate([[0.0], np.cumsum(totals)])
+        starts = np.maximum(np.arange(len(totals)) + 1 - window_days, 0)
+        return days, cumulative[1:] - cumulative[starts]
+
+    def keyword_totals(self, keywords):
+        """Total hours of tasks containing each keyword (case-insensitive)."""
+        task_hours = np.bincount(self.task_ids, weights=self.hours, minlength=len(self.tasks))
+        lowered = [task.lower() for task in self.tasks]
+        totals = {}
+        for keyword in keywords:
+            keyword = keyword.lower()
+            matches = np.fromiter((keyword in task for task in lowered), dtype=bool, count=len(lowered))
+            totals[keyword] = float(task_hours[matches].sum())
+        return totals
+
+    def task_totals(self):
+        """Total hours per distinct task, largest first."""
+        task_hours = np.bincount(self.task_ids, weights=self.hours, minlength=len(self.tasks))
+        order = np.argsort(-task_hours, kind='stable')
+        return [(self.tasks[i], float(task_hours[i])) for i in order]
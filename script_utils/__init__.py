@@ -0,0 +1 @@
+"""Small helpers shared by the scripts in this repo."""
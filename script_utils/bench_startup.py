@@ -0,0 +1,104 @@
+"""
+Benchmark how long the scripts take to start, by timing `python <script> --help`.
+
+With heavy imports (pandas, matplotlib, PIL, requests, ...) deferred until the
+stage that needs them, --help and argument errors should only cost the
+interpreter's own startup plus a few milliseconds. The numeric and columnar
+tools (the sweeps, extrapolate.py, task_log_analytics.py and
+batch_add_grade_data.py) still import numpy or pyarrow at the top, since every
+code path uses them, so their times include that import.
+
+Usage:
+    python script_utils/bench_startup.py
+    python script_utils/bench_startup.py "IBAR Feedback Grapher/generate_graph.py" --runs 20
+    python script_utils/bench_startup.py --importtime  # biggest imports per script
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Scripts with an argparse entry point, relative to the repo root
+SCRIPTS = [
+    'Class Make-Up Assignment Templater/batch_add_grade_data.py',
+    'Class Quarter Offered Searcher/get_class_quarters.py',
+    'Discussion Session CSP Solver/benchmark_solver.py',
+    'Discussion Session CSP Solver/propose_discussion_sections.py',
+    'Discussion Session CSP Solver/section_optimizer.py',
+    'Discussion Session CSP Solver/show_section_availabilities.py',
+    'Full Name to First Name/full_name_to_first_name.py',
+    'IBAR Feedback Grapher/generate_graph.py',
+    'IBAR Marginal Worth It Table Producer/generate_table.py',
+    'Metaculus AGI Extrapolation/extrapolate.py',
+    'Metaculus AGI Extrapolation/sweep.py',
+    'Pokemon Sprite Renamer/crop_png_to_content_batch.py',
+    'Pokemon Sprite Renamer/rename_pokemon_sprites.py',
+    'Pokemon Sprite Renamer/suffix_file.py',
+    'Query LLM APIs/query_claude_api_batch.py',
+    'Saint Petersburg Paradox Sim/game.py',
+    'Saint Petersburg Paradox Sim/sweep.py',
+    'Square Image Blur Background/square_image_blur_bg.py',
+    'Task Time Summer/sum_task_times.py',
+    'Task Time Summer/task_log_analytics.py',
+]
+NUM_TOP_IMPORTS = 5
+
+
+def time_command(command, runs):
+    """Wall times in milliseconds of running a command `runs` times."""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def top_imports(script):
+    """The slowest (cumulative microseconds, module) imports of `script --help` from -X importtime."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', script, '--help'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False)
+    imports = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        match = re.match(r'import time:\s+\d+\s+\|\s+(\d+)\s+\|(\s*)(\S+)', line)
+        # Only top-level imports (no extra indentation), since they include their children
+        if match and len(match.group(2)) == 1:
+            imports.append((int(match.group(1)), match.group(3)))
+    imports.sort(reverse=True)
+    return imports[:NUM_TOP_IMPORTS]
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Time `--help` for each script to check startup cost.')
+    parser.add_argument('scripts', nargs='*', help='Scripts to time (default: every script with a CLI)')
+    parser.add_argument('--runs', type=int, default=10, help='Runs per script (the median is reported)')
+    parser.add_argument('--importtime', action='store_true', help='Also list each script\'s slowest imports')
+    args = parser.parse_args()
+
+    scripts = args.scripts or [os.path.normpath(os.path.join(REPO_ROOT, script)) for script in SCRIPTS]
+
+    # The interpreter's own startup, to compare against
+    baseline = statistics.median(time_command([sys.executable, '-c', 'pass'], args.runs))
+    print(f'{"Script":<64} {"median ms":>10} {"min ms":>8} {"over python":>12}')
+    print(f'{"(python -c pass)":<64} {baseline:>10.1f}')
+
+    for script in scripts:
+        times = time_command([sys.executable, script, '--help'], args.runs)
+        median = statistics.median(times)
+        name = os.path.relpath(script, REPO_ROOT)
+        print(f'{name:<64} {median:>10.1f} {min(times):>8.1f} {median - baseline:>+12.1f}')
+        if args.importtime:
+            for microseconds, module in top_imports(script):
+                print(f'    {module:<60} {microseconds / 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
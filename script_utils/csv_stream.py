@@ -0,0 +1,102 @@
+"""
+Streaming CSV row transforms with constant memory.
+
+Rows are read and written one at a time, and outputs go to a temp file in the
+destination folder that atomically replaces the real file only once it's
+complete, so a crash never leaves a half-written CSV behind.
+"""
+
+import csv
+import os
+import stat
+import tempfile
+
+
+def copy_target_mode(temp_path, path):
+    """
+    Give a temp file the permissions path has (or a new file would get, if it doesn't
+    exist), since mkstemp creates it owner-only and os.replace keeps that mode.
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        # The umask can only be read by setting it
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    os.chmod(temp_path, mode)
+
+
+def read_fieldnames(path, encoding=None):
+    """Read just the header row of a CSV."""
+    with open(path, "r", newline="", encoding=encoding) as file:
+        return csv.DictReader(file).fieldnames or []
+
+
+def resolve_column(fieldnames, candidates):
+    """Return the first of candidates that's in the header, or None (e.g. 'Name' vs 'Full Name')."""
+    header = set(fieldnames or [])
+    for candidate in candidates:
+        if candidate in header:
+            return candidate
+    return None
+
+
+def resolve_columns(fieldnames, candidates):
+    """Return every one of candidates that's in the header, in candidates' order."""
+    header = set(fieldnames or [])
+    return [candidate for candidate in candidates if candidate in header]
+
+
+class AtomicCsvWriter:
+    """
+    Context manager for a csv.DictWriter that writes to a temp file and renames it
+    over path on a clean exit (or deletes it if an exception escapes).
+    """
+
+    def __init__(self, path, fieldnames, encoding=None, **writer_kwargs):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.encoding = encoding
+        self.writer_kwargs = writer_kwargs
+        self._file = None
+        self._temp_path = None
+
+    def __enter__(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, self._temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".csv.tmp")
+        self._file = os.fdopen(fd, "w", newline="\n", encoding=self.encoding)
+        writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, **self.writer_kwargs)
+        writer.writeheader()
+        return writer
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._file.close()
+        if exc_type is None:
+            copy_target_mode(self._temp_path, self.path)
+            os.replace(self._temp_path, self.path)
+        else:
+            os.remove(self._temp_path)
+        return False
+
+
+def transform_csv_in_place(path, transform, extra_fieldnames=(), encoding=None):
+    """
+    Stream every row of a CSV through transform(row) and atomically replace the file.
+
+    transform gets each row as a dict and returns the row to write, or None to drop it.
+    Columns in extra_fieldnames are appended to the header if they aren't there already.
+    Returns the number of rows written.
+    """
+    num_rows = 0
+    with open(path, "r", newline="", encoding=encoding) as file:
+        reader = csv.DictReader(file)
+        fieldnames = list(reader.fieldnames or [])
+        fieldnames += [name for name in extra_fieldnames if name not in fieldnames]
+        with AtomicCsvWriter(path, fieldnames, encoding=encoding) as writer:
+            for row in reader:
+                row = transform(row)
+                if row is not None:
+                    writer.writerow(row)
+                    num_rows += 1
+    return num_rows
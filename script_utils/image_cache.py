@@ -0,0 +1,143 @@
+"""
+Persistent cache of processed images, keyed by input content and processing parameters.
+
+The key is a hash of the input file's bytes (or, with match_pixels=True, of its
+decoded pixels, so re-exported but pixel-identical files also hit) together
+with the parameters that affect the output and the output format. Hits are
+copied out of the cache instead of being recomputed, so rerunning a batch, or
+a batch that overlaps an earlier one, costs little more than hashing.
+
+Usage:
+    cache = ImageCache(cache_dir, {'output_dimension': 3000, 'blur_size': 42})
+    key = cache.key(input_path, output_path)
+    if not cache.get(key, output_path):
+        ...  # process input_path into output_path
+        cache.put(key, output_path)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+CACHE_DIR_NAME = '.image_cache'
+HASH_CHUNK_SIZE = 1 << 20
+# Bump when pixel_hash() changes, so memoized pixel hashes from before aren't reused
+PIXEL_HASH_VERSION = 2
+
+
+def add_cache_arguments(parser, default_dir):
+    """Add --cache-dir, --no-cache and --match-pixels to an argparse parser."""
+    parser.add_argument('--cache-dir', default=default_dir, help='Where to keep processed images for reuse')
+    parser.add_argument('--no-cache', action='store_true', help='Always reprocess, and don\'t store results')
+    parser.add_argument('--match-pixels', action='store_true',
+                        help='Also reuse results for files with identical pixels but different bytes (slower)')
+
+
+def cache_from_args(args, params):
+    """An ImageCache for the parsed cache arguments, or None with --no-cache."""
+    if args.no_cache:
+        return None
+    return ImageCache(args.cache_dir, params, match_pixels=args.match_pixels)
+
+
+def file_hash(path):
+    """BLAKE2 hash of a file's bytes."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pixel_hash(path):
+    """
+    BLAKE2 hash of an image's decoded mode, size and pixels, plus its palette and
+    transparency since those change how the pixels render (ignores other metadata
+    and compression).
+    """
+    from PIL import Image
+
+    digest = hashlib.blake2b(digest_size=20)
+    with Image.open(path) as image:
+        digest.update(f'{image.mode} {image.size}'.encode('utf-8'))
+        digest.update(image.tobytes())
+        palette = image.getpalette() if image.mode in ('P', 'PA') else None
+        digest.update(repr((palette, image.info.get('transparency'))).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _write_atomic(directory, path, write):
+    """Call write(temp path) on a temp file in directory, then rename it to path."""
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class ImageCache:
+    """Processed outputs on disk, as cache_dir/<first 2 key characters>/<key> (keys end in the output extension)."""
+
+    def __init__(self, cache_dir, params, match_pixels=False):
+        self.cache_dir = cache_dir
+        # Canonical JSON so the same parameters always give the same key
+        self.params = json.dumps(params, sort_keys=True)
+        self.match_pixels = match_pixels
+        self.pixels_dir = os.path.join(cache_dir, f'pixels-v{PIXEL_HASH_VERSION}')
+        os.makedirs(self.pixels_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _content_hash(self, input_path):
+        byte_hash = file_hash(input_path)
+        if not self.match_pixels:
+            return byte_hash
+        # Remember each file's pixel hash so identical files are only decoded once
+        memo_path = os.path.join(self.pixels_dir, byte_hash)
+        try:
+            with open(memo_path, 'r', encoding='utf-8') as file:
+                return file.read().strip()
+        except OSError:
+            pass
+        content_hash = f'pixels-v{PIXEL_HASH_VERSION}-' + pixel_hash(input_path)
+
+        def write(temp_path):
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                file.write(content_hash)
+
+        _write_atomic(self.pixels_dir, memo_path, write)
+        return content_hash
+
+    def key(self, input_path, output_path):
+        """Cache key for processing input_path into a file like output_path."""
+        output_extension = os.path.splitext(output_path)[1].lower()
+        digest = hashlib.sha256()
+        for part in (self.params, output_extension, self._content_hash(input_path)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest() + output_extension
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key, output_path):
+        """Copy the cached output to output_path and return True, or return False on a miss."""
+        try:
+            shutil.copyfile(self._path(key), output_path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, key, output_path):
+        """Store a freshly processed output under key."""
+        directory = os.path.dirname(self._path(key))
+        os.makedirs(directory, exist_ok=True)
+        _write_atomic(directory, self._path(key), lambda temp_path: shutil.copyfile(output_path, temp_path))
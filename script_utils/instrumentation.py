@@ -0,0 +1,231 @@
+"""
+Lightweight per-stage timing and profiling for the batch scripts.
+
+Everything is a no-op until profiling is turned on, either with the
+SCRIPT_PROFILE environment variable or a script's --profile flag. The value
+is a comma-separated list of what to capture:
+    SCRIPT_PROFILE=1                        stage timers and counters only
+    SCRIPT_PROFILE=cprofile                 ... plus the top functions from cProfile
+    SCRIPT_PROFILE=tracemalloc              ... plus peak memory per stage
+    SCRIPT_PROFILE=cprofile,tracemalloc     ... both
+When the script exits, a JSON report is written to SCRIPT_PROFILE_DIR (default:
+the working directory) as <script>_profile_<timestamp>_<pid>.json, along with a
+.prof file for cProfile runs.
+
+Usage:
+    with stage('solve'):
+        ...
+    count('solutions', len(solutions))
+
+Worker processes never run atexit, so for a process pool, start the workers
+with worker_initializer/worker_initargs() and submit run_collecting(function,
+...) instead of function. Its stats come back with the result and are merged
+into the main report with merge_stats(); their stage seconds add up across
+workers, so they can exceed the wall time. cProfile output only covers the
+main process.
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import sys
+import time
+
+ENV_VAR = 'SCRIPT_PROFILE'
+DIR_ENV_VAR = 'SCRIPT_PROFILE_DIR'
+NUM_TOP_FUNCTIONS = 30
+
+
+class _Profile:
+    def __init__(self):
+        self.enabled = False
+        self.options = set()
+        self.started = None
+        self.stages = {}
+        self.counters = {}
+        self.profiler = None
+        self.report_dir = None
+        # Peak traced memory so far of each open stage, innermost last
+        self.peaks = []
+
+
+_profile = _Profile()
+
+
+def enabled():
+    return _profile.enabled
+
+
+def enable(options='1', report_dir=None, write_at_exit=True):
+    """Turn on profiling (options as in SCRIPT_PROFILE) and write the report at exit."""
+    if _profile.enabled:
+        return
+    _profile.enabled = True
+    _profile.options = {option.strip().lower() for option in str(options).split(',') if option.strip()}
+    _profile.started = time.perf_counter()
+    _profile.report_dir = report_dir or os.environ.get(DIR_ENV_VAR) or os.getcwd()
+
+    if 'tracemalloc' in _profile.options:
+        import tracemalloc
+
+        tracemalloc.start()
+    if 'cprofile' in _profile.options:
+        import cProfile
+
+        _profile.profiler = cProfile.Profile()
+        _profile.profiler.enable()
+
+    if write_at_exit:
+        atexit.register(write_report)
+
+
+def add_profile_argument(parser):
+    """Add a --profile [OPTIONS] flag; call enable_from_args(args) after parsing."""
+    parser.add_argument('--profile', nargs='?', const='1', default=None, metavar='OPTIONS',
+                        help=f'Write a timing report at exit (options like {ENV_VAR}: cprofile,tracemalloc)')
+
+
+def enable_from_args(args):
+    if getattr(args, 'profile', None):
+        enable(args.profile)
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Time a block of work, accumulating across repeated calls with the same name."""
+    if not _profile.enabled:
+        yield
+        return
+
+    tracing = 'tracemalloc' in _profile.options
+    if tracing:
+        import tracemalloc
+
+        # Resetting the peak would lose the enclosing stage's, so save it first
+        if _profile.peaks:
+            _profile.peaks[-1] = max(_profile.peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        _profile.peaks.append(0)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stats = _profile.stages.setdefault(name, {'calls': 0, 'seconds': 0.0})
+        stats['calls'] += 1
+        stats['seconds'] += elapsed
+        if tracing:
+            peak = max(_profile.peaks.pop(), tracemalloc.get_traced_memory()[1])
+            stats['peak_bytes'] = max(stats.get('peak_bytes', 0), peak)
+            if _profile.peaks:
+                _profile.peaks[-1] = max(_profile.peaks[-1], peak)
+
+
+def count(name, amount=1):
+    """Add to a named counter (e.g. cache hits, images processed)."""
+    if _profile.enabled:
+        _profile.counters[name] = _profile.counters.get(name, 0) + amount
+
+
+def worker_initargs():
+    """initargs for worker_initializer, to profile pool workers like this process."""
+    return (','.join(sorted(_profile.options)) if _profile.enabled else None,)
+
+
+def worker_initializer(options):
+    """Pool initializer: turn profiling on in a worker (without its own report) if it's on here."""
+    if not options:
+        return
+    if not _profile.enabled:
+        enable(options, write_at_exit=False)
+    # Forked workers start with a copy of the main process's stats, which it already has
+    _profile.stages = {}
+    _profile.counters = {}
+    _profile.peaks = []
+
+
+def run_collecting(function, *args, **kwargs):
+    """
+    Call function in a worker and return (its result, the stages and counters it recorded),
+    for merge_stats() in the main process.
+    """
+    result = function(*args, **kwargs)
+    stats = {'stages': _profile.stages, 'counters': _profile.counters}
+    _profile.stages = {}
+    _profile.counters = {}
+    return result, stats
+
+
+def merge_stats(stats):
+    """Add a worker's stages and counters from run_collecting() to this process's."""
+    if not _profile.enabled:
+        return
+    for name, worker_stage in stats['stages'].items():
+        merged = _profile.stages.setdefault(name, {'calls': 0, 'seconds': 0.0})
+        merged['calls'] += worker_stage['calls']
+        merged['seconds'] += worker_stage['seconds']
+        if 'peak_bytes' in worker_stage:
+            merged['peak_bytes'] = max(merged.get('peak_bytes', 0), worker_stage['peak_bytes'])
+    for name, amount in stats['counters'].items():
+        count(name, amount)
+
+
+def _top_functions(profiler):
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, function), (_, num_calls, total_time, cumulative_time, _) in stats.stats.items():
+        rows.append({
+            'function': f'{os.path.basename(filename)}:{line}({function})',
+            'calls': num_calls,
+            'tottime': total_time,
+            'cumtime': cumulative_time,
+        })
+    rows.sort(key=lambda row: row['cumtime'], reverse=True)
+    return rows[:NUM_TOP_FUNCTIONS]
+
+
+def report():
+    """The current report as a dict."""
+    result = {
+        'script': os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else None,
+        'argv': sys.argv[1:],
+        'wall_seconds': time.perf_counter() - _profile.started if _profile.started else 0.0,
+        'stages': _profile.stages,
+        'counters': _profile.counters,
+    }
+    if 'tracemalloc' in _profile.options:
+        import tracemalloc
+
+        if tracemalloc.is_tracing():
+            result['traced_memory_bytes'] = tracemalloc.get_traced_memory()[0]
+    if _profile.profiler is not None:
+        result['top_functions'] = _top_functions(_profile.profiler)
+    return result
+
+
+def write_report():
+    """Write the JSON report (and .prof file for cProfile runs). Returns the report path."""
+    if not _profile.enabled:
+        return None
+    if _profile.profiler is not None:
+        _profile.profiler.disable()
+
+    script = os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+    # Milliseconds and the pid keep runs started in the same second from overwriting each other
+    now = time.time()
+    timestamp = f'{time.strftime("%Y%m%d-%H%M%S", time.localtime(now))}-{int(now * 1000) % 1000:03d}'
+    stem = os.path.join(_profile.report_dir, f'{script}_profile_{timestamp}_{os.getpid()}')
+    with open(stem + '.json', 'w', encoding='utf-8') as file:
+        json.dump(report(), file, indent=2)
+    if _profile.profiler is not None:
+        _profile.profiler.dump_stats(stem + '.prof')
+    print(f'Wrote profile report to {stem}.json', file=sys.stderr)
+    return stem + '.json'
+
+
+# Turn on from the environment so scripts don't need to be edited
+if os.environ.get(ENV_VAR, '').strip() not in ('', '0'):
+    enable(os.environ[ENV_VAR])
@@ -0,0 +1,57 @@
+"""
+Headless, parallel matplotlib rendering.
+
+Figures are rendered with the non-interactive Agg backend, and independent
+figures (one per rating scale, heatmap, event, ...) are rendered in a process
+pool. Render functions must be module-level so they can be pickled, and the
+calling script needs an `if __name__ == '__main__':` guard so worker processes
+can import it.
+"""
+
+import os
+
+OUTPUT_FORMATS = ['png', 'svg', 'pdf']
+DEFAULT_DPI = 300
+
+
+def use_headless_backend():
+    """Switch matplotlib to Agg before pyplot is used, so no GUI is ever started."""
+    import matplotlib
+
+    matplotlib.use('Agg')
+
+
+def add_render_arguments(parser):
+    """Add --format, --dpi and --render-workers to an argparse parser."""
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='png',
+                        help='Image format (svg/pdf are vector and skip rasterizing at --dpi)')
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI, help='Resolution of raster output')
+    parser.add_argument('--render-workers', type=int, default=None,
+                        help='Figures to render in parallel (default: one per core)')
+
+
+def output_path(stem, output_format):
+    """E.g. output_path('heatmap_counts', 'svg') -> 'heatmap_counts.svg'."""
+    return f'{stem}.{output_format}'
+
+
+def _run_job(job):
+    function, args = job
+    return function(*args)
+
+
+def render_figures(jobs, workers=None):
+    """
+    Run render jobs, each a (function, args) tuple, and return their results in order.
+
+    Jobs run in a process pool when there's more than one of them, otherwise inline.
+    """
+    use_headless_backend()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        return [_run_job(job) for job in jobs]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=use_headless_backend) as executor:
+        return list(executor.map(_run_job, jobs))
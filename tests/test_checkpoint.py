@@ -0,0 +1,36 @@
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Class Quarter Offered Searcher'))
+from checkpoint import load_ug_reqs, write_csv_atomic, write_ug_reqs_atomic  # noqa: E402
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason='POSIX file modes')
+
+
+def file_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_write_csv_atomic_keeps_mode(tmp_path):
+    path = tmp_path / 'classes.csv'
+    path.write_text('Class\nCS 224N\n')
+    os.chmod(path, 0o644)
+
+    write_csv_atomic(str(path), [{'Class': 'CS 221'}], ['Class'])
+
+    assert path.read_text() == 'Class\nCS 221\n'
+    assert file_mode(path) == 0o644
+
+
+def test_ug_reqs_sidecar_keeps_mode(tmp_path):
+    csv_path = str(tmp_path / 'classes.csv')
+    write_ug_reqs_atomic(csv_path, {'CS 221': ['WAY-AQR']})
+    os.chmod(csv_path + '.ug_reqs.json', 0o640)
+
+    write_ug_reqs_atomic(csv_path, {'CS 221': ['WAY-AQR', 'WAY-FR']})
+
+    assert load_ug_reqs(csv_path) == {'CS 221': ['WAY-AQR', 'WAY-FR']}
+    assert file_mode(csv_path + '.ug_reqs.json') == 0o640
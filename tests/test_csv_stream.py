@@ -0,0 +1,52 @@
+import os
+import stat
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO_ROOT)
+from script_utils.csv_stream import AtomicCsvWriter, transform_csv_in_place  # noqa: E402
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason='POSIX file modes')
+
+
+def file_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def current_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def test_transform_in_place_keeps_mode(tmp_path):
+    path = tmp_path / 'names.csv'
+    path.write_text('Name\nJane Doe\n')
+    os.chmod(path, 0o644)
+
+    transform_csv_in_place(str(path), lambda row: row)
+
+    assert file_mode(path) == 0o644
+
+
+def test_new_file_gets_umask_mode(tmp_path):
+    path = tmp_path / 'new.csv'
+    with AtomicCsvWriter(str(path), ['a']) as writer:
+        writer.writerow({'a': 1})
+
+    assert file_mode(path) == 0o666 & ~current_umask()
+
+
+def test_full_name_to_first_name_keeps_mode(tmp_path):
+    path = tmp_path / 'names.csv'
+    path.write_text('Name,Full Name\n,Jane Doe\nBob Smith,\n')
+    os.chmod(path, 0o644)
+    script = os.path.join(REPO_ROOT, 'Full Name to First Name', 'full_name_to_first_name.py')
+
+    subprocess.run([sys.executable, script, str(path)], check=True, stdout=subprocess.DEVNULL)
+
+    assert path.read_text() == 'Name,Full Name,first_name\n,Jane Doe,Jane\nBob Smith,,Bob\n'
+    assert file_mode(path) == 0o644
@@ -0,0 +1,52 @@
+import os
+import stat
+import subprocess
+import sys
+
+import pytest
+
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Class Make-Up Assignment Templater')
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason='POSIX file modes')
+
+ATTENDANCE = (
+    'Name,Email,Enrolled,Attendance,Reflections\n'
+    'Jane Doe,jane@stanford.edu ,TRUE,7,6\n'
+    '"Smith, Bob",bob@stanford.edu,TRUE,5,3\n'
+    'Gone,gone@stanford.edu,TRUE,Dropped,0\n'
+)
+
+
+def file_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def default_mode():
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def test_sts10si_outputs_get_default_mode(tmp_path):
+    (tmp_path / 'sts10si_attendance_input.csv').write_text(ATTENDANCE)
+
+    subprocess.run([sys.executable, os.path.join(SCRIPT_DIR, 'sts10si_add_grade_data.py')],
+                   cwd=tmp_path, check=True, stdout=subprocess.DEVNULL)
+
+    for name in ['sts10si_attendance_output_finished.csv', 'sts10si_attendance_output_makeup.csv']:
+        assert file_mode(tmp_path / name) == default_mode()
+    assert (tmp_path / 'sts10si_attendance_output_finished.csv').read_text() == (
+        'email,full_name,first_name,attendance_completed,reflections_completed\n'
+        'jane@stanford.edu,Jane Doe,Jane,7,6\n'
+    )
+
+
+def test_batch_outputs_get_default_mode(tmp_path):
+    pytest.importorskip('pyarrow')
+    (tmp_path / 'course.csv').write_text(ATTENDANCE)
+
+    subprocess.run([sys.executable, os.path.join(SCRIPT_DIR, 'batch_add_grade_data.py'), str(tmp_path),
+                    '--output-dir', str(tmp_path), '--workers', '1'], check=True, stdout=subprocess.DEVNULL)
+
+    for name in ['course_output_finished.csv', 'course_output_makeup.csv']:
+        assert file_mode(tmp_path / name) == default_mode()